@@ -0,0 +1,377 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the ArrayBoard class, a second representation of a Blocky
+board that stores the quadtree in flat arrays instead of a tree of Block
+objects.
+
+Nodes are numbered in level order: the root is node 0 and the children of
+node i are nodes 4i + 1, 4i + 2, 4i + 3 and 4i + 4, in the same order that
+Block uses for its children (upper-right, upper-left, lower-left,
+lower-right). Every possible node of a board with a given max_depth has a
+slot, so no child pointers are stored. For each node we only keep one byte
+saying whether it is split and one byte holding the index of its colour in
+PALETTE.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+import random
+import math
+
+from block import Block
+from settings import colour_index, COLOUR_LIST, PALETTE
+
+# The order of the children after a horizontal (0) or vertical (1) swap.
+# Child i of the swapped block is child _SWAP_ORDER[direction][i] of the
+# original block.
+_SWAP_ORDER = {
+    0: (1, 0, 3, 2),
+    1: (3, 2, 1, 0)
+}
+
+# Cache of the permutations used by rotate, keyed by (depth, direction).
+_ROTATE_ORDER: Dict[Tuple[int, int], List[int]] = {}
+
+
+def _level_start(level: int) -> int:
+    """Return the index of the first node at <level>.
+    """
+    return (4 ** level - 1) // 3
+
+
+def _rotate_order(depth: int, direction: int) -> List[int]:
+    """Return the list L such that, after a subtree is rotated in
+    <direction>, the node at offset i among its descendants <depth> levels
+    down is the node that was at offset L[i] before the rotation.
+
+    Rotating clockwise (1) moves child (i + 1) % 4 into slot i, and rotating
+    counter-clockwise (3) moves child (i + 3) % 4 into slot i. A rotation is
+    applied at every level of the subtree, so every base-4 digit of an offset
+    is shifted by <direction>.
+    """
+    key = (depth, direction)
+    if key not in _ROTATE_ORDER:
+        if depth == 0:
+            _ROTATE_ORDER[key] = [0]
+        else:
+            below = _rotate_order(depth - 1, direction)
+            step = 4 ** (depth - 1)
+            order = []
+            for digit in range(4):
+                start = ((digit + direction) % 4) * step
+                order.extend(start + offset for offset in below)
+            _ROTATE_ORDER[key] = order
+    return _ROTATE_ORDER[key]
+
+
+class ArrayBoard:
+    """A Blocky board stored as an implicit quadtree in two byte arrays.
+
+    The moves have the same meaning as the Block methods of the same name,
+    but they take the index of the node to act on instead of being called on
+    a Block.
+
+    === Public Attributes ===
+    size:
+        The height and width of the board, in pixels.
+    max_depth:
+        The deepest level allowed in the board.
+
+    === Representation Invariants ===
+    - len(_split) == len(_colour) == number of nodes in a complete quadtree
+      of depth max_depth
+    - _split[i] == 0 for every node i at level max_depth
+    - the colour of node i is only meaningful if its parent is split and i
+      itself is not split (or i is the root and is not split)
+    """
+    # === Private Attributes ===
+    # _split:
+    #   _split[i] is 1 iff node i is subdivided into four children.
+    # _colour:
+    #   _colour[i] is the index in PALETTE of the colour of leaf i.
+    size: int
+    max_depth: int
+    _split: bytearray
+    _colour: bytearray
+
+    def __init__(self, size: int, max_depth: int,
+                 colour: Tuple[int, int, int]) -> None:
+        """Initialize this board as a single undivided block of <colour> with
+        dimensions <size> by <size>.
+
+        Preconditions:
+            - size > 0
+            - max_depth >= 0
+        """
+        self.size = size
+        self.max_depth = max_depth
+        num_nodes = _level_start(max_depth + 1)
+        self._split = bytearray(num_nodes)
+        self._colour = bytearray(num_nodes)
+        self._colour[0] = colour_index(colour)
+
+    def __eq__(self, other: ArrayBoard) -> bool:
+        """Return True iff this board and <other> describe the same blocks.
+        """
+        if self.size != other.size or self.max_depth != other.max_depth:
+            return False
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._split[node] != other._split[node]:
+                return False
+            elif self._split[node]:
+                stack.extend(range(4 * node + 1, 4 * node + 5))
+            elif self._colour[node] != other._colour[node]:
+                return False
+        return True
+
+    @staticmethod
+    def from_block(block: Block) -> ArrayBoard:
+        """Return a new ArrayBoard holding the same blocks as <block>.
+
+        Precondition: block.level == 0
+        """
+        board = ArrayBoard(block.size, block.max_depth, COLOUR_LIST[0])
+        stack = [(block, 0)]
+        while stack:
+            current, node = stack.pop()
+            if len(current.children) == 4:
+                board._split[node] = 1
+                for i in range(4):
+                    stack.append((current.children[i], 4 * node + 1 + i))
+            else:
+                board._colour[node] = current.colour_index
+        return board
+
+    def to_block(self) -> Block:
+        """Return a new Block tree holding the same blocks as this board.
+        """
+        root = Block((0, 0), self.size, None, 0, self.max_depth)
+        stack = [(root, 0)]
+        while stack:
+            block, node = stack.pop()
+            if self._split[node]:
+                positions = block._children_positions()
+                size = block._child_size()
+                for i in range(4):
+                    child = Block(positions[i], size, None, block.level + 1,
+                                  self.max_depth)
+                    block.children.append(child)
+                    stack.append((child, 4 * node + 1 + i))
+            else:
+                block.colour = self._colour[node]
+        return root
+
+    def level(self, node: int) -> int:
+        """Return the level of <node> in this board.
+        """
+        level = 0
+        while _level_start(level + 1) <= node:
+            level += 1
+        return level
+
+    def children(self, node: int) -> List[int]:
+        """Return the indices of the children of <node>, or an empty list if
+        <node> is a leaf.
+        """
+        if self._split[node]:
+            return [4 * node + 1, 4 * node + 2, 4 * node + 3, 4 * node + 4]
+        return []
+
+    def colour(self, node: int) -> Optional[Tuple[int, int, int]]:
+        """Return the colour of <node>, or None if it is subdivided.
+        """
+        if self._split[node]:
+            return None
+        return PALETTE[self._colour[node]]
+
+    def node_size(self, node: int) -> int:
+        """Return the size of <node> in pixels, rounded the same way as
+        Block._child_size.
+        """
+        size = self.size
+        for _ in range(self.level(node)):
+            size = round(size / 2.0)
+        return size
+
+    def position(self, node: int) -> Tuple[int, int]:
+        """Return the (x, y) coordinates of the upper left corner of <node>.
+        """
+        path = []
+        while node > 0:
+            path.append((node - 1) % 4)
+            node = (node - 1) // 4
+
+        x, y, size = 0, 0, self.size
+        for child in reversed(path):
+            size = round(size / 2.0)
+            if child in (0, 3):
+                x += size
+            if child in (2, 3):
+                y += size
+        return x, y
+
+    def smashable(self, node: int) -> bool:
+        """Return True iff <node> can be smashed.
+        """
+        return not self._split[node] and self.level(node) != self.max_depth
+
+    def smash(self, node: int) -> bool:
+        """Sub-divide <node> into four randomly generated children, following
+        the same rules as Block.smash.
+
+        Return True iff the smash was performed.
+        """
+        if not self.smashable(node):
+            return False
+        self._smash_at(node, self.level(node))
+        return True
+
+    def _smash_at(self, node: int, level: int) -> None:
+        """Sub-divide <node>, which is at <level>, into four random children.
+
+        The random numbers are drawn in the same order as Block.smash, so
+        both representations generate the same board from the same seed.
+        """
+        self._split[node] = 1
+        for child in range(4 * node + 1, 4 * node + 5):
+            self._colour[child] = random.randrange(len(COLOUR_LIST))
+            if random.random() < math.exp(-0.25 * (level + 1)) and \
+                    level + 1 != self.max_depth:
+                self._smash_at(child, level + 1)
+
+    def _reorder_subtree(self, node: int,
+                         orders: List[List[int]]) -> None:
+        """Rearrange the descendants of <node>.
+
+        orders[d] is the new order of the descendants of <node> that are
+        d + 1 levels below it: the descendant at offset i afterwards is the
+        one that was at offset orders[d][i] before.
+        """
+        first = node
+        for order in orders:
+            first = 4 * first + 1
+            last = first + len(order)
+            for array in (self._split, self._colour):
+                old = array[first:last]
+                array[first:last] = bytes(map(old.__getitem__, order))
+
+    def swap(self, node: int, direction: int) -> bool:
+        """Swap the children of <node> horizontally (0) or vertically (1).
+
+        Return True iff the swap was performed.
+        """
+        if not self._split[node]:
+            return False
+        order = _SWAP_ORDER[direction]
+        orders = []
+        # Each child's descendants at a given depth are a contiguous run of
+        # nodes, so a swap only moves whole runs around.
+        for depth in range(self.max_depth - self.level(node)):
+            run = 4 ** depth
+            orders.append([order[i // run] * run + i % run
+                           for i in range(4 * run)])
+        self._reorder_subtree(node, orders)
+        return True
+
+    def rotate(self, node: int, direction: int) -> bool:
+        """Rotate <node> and all its descendants clockwise (1) or
+        counter-clockwise (3).
+
+        Return True iff the rotate was performed.
+        """
+        if not self._split[node]:
+            return False
+        depth = self.max_depth - self.level(node)
+        self._reorder_subtree(node, [_rotate_order(d, direction)
+                                     for d in range(1, depth + 1)])
+        return True
+
+    def paint(self, node: int, colour: Tuple[int, int, int]) -> bool:
+        """Change the colour of <node> iff it is at max_depth and its colour
+        is different from <colour>.
+
+        Return True iff the colour was changed.
+        """
+        index = colour_index(colour)
+        if self.level(node) == self.max_depth and \
+                self._colour[node] != index:
+            self._colour[node] = index
+            return True
+        return False
+
+    def combine(self, node: int) -> bool:
+        """Turn <node> into a leaf of the majority colour of its children,
+        following the same rules as Block.combine.
+
+        Return True iff <node> was turned into a leaf.
+        """
+        if not self._split[node] or self.level(node) != self.max_depth - 1:
+            return False
+        counts = [0] * len(PALETTE)
+        for child in range(4 * node + 1, 4 * node + 5):
+            counts[self._colour[child]] += 1
+        majority = [i for i in range(len(counts)) if counts[i] >= 2]
+        if len(majority) == 1:
+            self._split[node] = 0
+            self._colour[node] = majority[0]
+            return True
+        return False
+
+    def create_copy(self) -> ArrayBoard:
+        """Return a new ArrayBoard that is a copy of this board.
+        """
+        copy = ArrayBoard.__new__(ArrayBoard)
+        copy.size = self.size
+        copy.max_depth = self.max_depth
+        copy._split = self._split[:]
+        copy._colour = self._colour[:]
+        return copy
+
+
+def generate_array_board(max_depth: int, size: int) -> ArrayBoard:
+    """Return a new random ArrayBoard with a depth of <max_depth> and
+    dimensions of <size> by <size>.
+
+    This draws the same random numbers as block.generate_board, so both
+    functions build the same board after the same call to random.seed.
+
+    >>> board = generate_array_board(3, 750)
+    >>> board.max_depth
+    3
+    >>> len(board.children(0)) == 4
+    True
+    """
+    board = ArrayBoard(size, max_depth, random.choice(COLOUR_LIST))
+    board.smash(0)
+    return board
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'block', 'settings'
+        ],
+        'max-attributes': 15
+    })
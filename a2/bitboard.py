@@ -0,0 +1,171 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains functions that turn a Blocky board into one bitboard per
+colour, and goals that score a board from its bitboards.
+
+A bitboard is a Python int with one bit for each unit cell of the board. The
+cell in column i and row j of a board <side> unit cells wide is bit
+j * side + i, so each row is a run of <side> bits and moving one cell right
+or down is a shift by 1 or by <side> bits. A board of depth 5 has 1024 cells,
+so each of its bitboards is a 1024-bit int.
+
+Scoring a bitboard only uses &, |, shifts and counting bits, so these goals
+need neither NumPy nor a flattened board:
+    - the perimeter is the number of target cells in each of the four edge
+      masks, so a corner, which is in two masks, is counted twice.
+    - a blob is grown from one of its cells by shifting it one cell in every
+      direction at once and keeping only the target cells, until it stops
+      growing. The column masks stop a shift from wrapping a cell around to
+      the other side of the board.
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+from block import Block
+from goal import BlobGoal, PerimeterGoal, _leaf_regions
+from settings import PALETTE
+
+# The masks used for a board <side> unit cells wide, keyed by <side>: (every
+# cell but those in the first column, every cell but those in the last
+# column, the top, bottom, left and right edges).
+_MASKS: Dict[int, Tuple[int, int, int, int, int, int]] = {}
+
+# _SQUARES[(side, cells)] is the mask of a square of <cells> by <cells> unit
+# cells in the upper left corner of a board <side> unit cells wide.
+_SQUARES: Dict[Tuple[int, int], int] = {}
+
+
+def _masks(side: int) -> Tuple[int, int, int, int, int, int]:
+    """Return the masks for a board <side> unit cells wide, in the order
+    described by _MASKS.
+    """
+    if side not in _MASKS:
+        full = (1 << side * side) - 1
+        row = (1 << side) - 1
+        left = sum(1 << j * side for j in range(side))
+        right = left << side - 1
+        _MASKS[side] = (full & ~left, full & ~right, row,
+                        row << side * (side - 1), left, right)
+    return _MASKS[side]
+
+
+def _square(side: int, cells: int) -> int:
+    """Return the mask of a square of <cells> by <cells> unit cells in the
+    upper left corner of a board <side> unit cells wide.
+    """
+    key = (side, cells)
+    if key not in _SQUARES:
+        row = (1 << cells) - 1
+        _SQUARES[key] = sum(row << j * side for j in range(cells))
+    return _SQUARES[key]
+
+
+def _count(bits: int) -> int:
+    """Return the number of bits set in <bits>.
+    """
+    return bin(bits).count('1')
+
+
+def to_bitboards(board: Block) -> List[int]:
+    """Return the bitboards of <board>, where the bitboard at index c is the
+    set of unit cells of the colour at index c in PALETTE.
+
+    <board> may also be a PersistentBlock.
+
+    >>> from settings import COLOUR_LIST
+    >>> to_bitboards(Block((0, 0), 750, COLOUR_LIST[1], 0, 1))[1]
+    15
+    """
+    side = 2 ** (board.max_depth - board.level)
+    bitboards = [0] * len(PALETTE)
+    for block, column, row, cells in _leaf_regions(board):
+        bitboards[block.colour_index] |= \
+            _square(side, cells) << row * side + column
+    return bitboards
+
+
+def perimeter_bits(bits: int, side: int) -> int:
+    """Return the score of a PerimeterGoal whose target cells are <bits>, on a
+    board <side> unit cells wide.
+    """
+    if side == 1:  # the only cell is every corner at once
+        return 2 * bits
+    _, _, top, bottom, left, right = _masks(side)
+    return _count(bits & top) + _count(bits & bottom) + \
+        _count(bits & left) + _count(bits & right)
+
+
+def blob_bits(bits: int, side: int) -> int:
+    """Return the score of a BlobGoal whose target cells are <bits>, on a
+    board <side> unit cells wide.
+    """
+    not_left, not_right, _, _, _, _ = _masks(side)
+    best = 0
+    while bits:
+        blob = bits & -bits  # the lowest cell left is in a blob not yet found
+        while True:
+            # A cell shifted right into the first column, or left into the
+            # last one, has wrapped around from the row before or after
+            grown = (blob | ((blob << 1) & not_left) |
+                     ((blob >> 1) & not_right) | (blob << side) |
+                     (blob >> side)) & bits
+            if grown == blob:
+                break
+            blob = grown
+        best = max(best, _count(blob))
+        bits &= ~blob
+    return best
+
+
+class BitboardPerimeterGoal(PerimeterGoal):
+    """A PerimeterGoal that scores a board from its bitboard.
+
+    This gives the same scores as PerimeterGoal.
+    """
+    def score(self, board: Block) -> int:
+        """Return the current score for this goal on the given board.
+        """
+        return perimeter_bits(to_bitboards(board)[self.colour_index],
+                              2 ** (board.max_depth - board.level))
+
+
+class BitboardBlobGoal(BlobGoal):
+    """A BlobGoal that scores a board from its bitboard.
+
+    This gives the same scores as BlobGoal.
+    """
+    def score(self, board: Block) -> int:
+        """Return the current score for this goal on the given board.
+        """
+        return blob_bits(to_bitboards(board)[self.colour_index],
+                         2 ** (board.max_depth - board.level))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'block', 'goal',
+            'settings'
+        ],
+        'max-attributes': 15
+    })
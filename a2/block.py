@@ -22,11 +22,82 @@ Misha Schwartz, and Jaisie Sin
 This file contains the Block class, the main data structure used in the game.
 """
 from __future__ import annotations
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Iterator, Optional, Tuple, List, TextIO, \
+    Union
+import io
 import random
 import math
 
-from settings import colour_name, COLOUR_LIST
+from settings import colour_name, colour_index, COLOUR_LIST, PALETTE
+
+# A transform of a Block is one of the 8 symmetries of a square, stored as
+# the tuple T such that, once the transform is applied, the child at index i
+# is the transformed version of the child that was at index T[i].
+_IDENTITY = (0, 1, 2, 3)
+_TRANSFORMS = [_IDENTITY, (1, 2, 3, 0), (2, 3, 0, 1), (3, 0, 1, 2),
+               (1, 0, 3, 2), (3, 2, 1, 0), (2, 1, 0, 3), (0, 3, 2, 1)]
+# _COMPOSITION[(first, then)] is the transform that applies <first> and then
+# <then>. Looking it up always returns one of the tuples in _TRANSFORMS, so
+# transforms can be compared with "is".
+_COMPOSITION = {
+    (first, then): _TRANSFORMS[_TRANSFORMS.index(tuple(first[i]
+                                                       for i in then))]
+    for first in _TRANSFORMS for then in _TRANSFORMS
+}
+# The transforms applied by rotate, keyed by direction.
+_ROTATION = {
+    1: _TRANSFORMS[1],
+    3: _TRANSFORMS[3]
+}
+# The new order of the children after swap, keyed by direction. Unlike a
+# rotation, a swap does not transform the children themselves.
+_SWAP_ORDER = {
+    0: (1, 0, 3, 2),
+    1: (3, 2, 1, 0)
+}
+# _AFTER[T][i] is the index in _TRANSFORMS of the transform that applies T
+# and then _TRANSFORMS[i].
+_AFTER = {
+    first: [_TRANSFORMS.index(_COMPOSITION[first, then])
+            for then in _TRANSFORMS]
+    for first in _TRANSFORMS
+}
+
+# Fingerprints are 64-bit ints.
+_MASK = 2 ** 64 - 1
+# Random keys used for fingerprints, keyed by (kind, level, index). Each key
+# is drawn from its own generator seeded by the key's name, so fingerprints
+# are the same in every run and do not change the game's random numbers.
+_KEYS: Dict[Tuple[str, int, int], int] = {}
+# _LEAF_FINGERPRINTS[(level, colour)] is the fingerprint of a leaf at <level>
+# with the colour at index <colour> in PALETTE, in every orientation. Leaves
+# share these instead of each keeping its own.
+_LEAF_FINGERPRINTS: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+
+
+def _key(kind: str, level: int, index: int) -> int:
+    """Return the random 64-bit key for (<kind>, <level>, <index>).
+
+    A 'leaf' key is used for a leaf at <level> with the colour at <index> in
+    PALETTE. A 'slot' key multiplies the fingerprint of the child at <index>
+    of a block at <level>, and is always odd. A 'parent' key is added for
+    every subdivided block at <level>, and <index> is 0.
+    """
+    if (kind, level, index) not in _KEYS:
+        key = random.Random(f'{kind} {level} {index}').getrandbits(64)
+        if kind == 'slot':
+            key |= 1
+        _KEYS[kind, level, index] = key
+    return _KEYS[kind, level, index]
+
+
+def _reorient(fingerprints: Tuple[int, ...], transform: Tuple[int, ...]) \
+        -> Tuple[int, ...]:
+    """Return the fingerprints of a Block after <transform> is applied to it,
+    given its <fingerprints> before.
+    """
+    order = _AFTER[transform]
+    return tuple(fingerprints[i] for i in order)
 
 
 def generate_board(max_depth: int, size: int) -> Block:
@@ -66,7 +137,8 @@ class Block:
         The height and width of this square Block.
     colour:
         If this block is not subdivided, <colour> stores its colour. Otherwise,
-        <colour> is None.
+        <colour> is None. It can be set to a colour or to its index in
+        PALETTE.
     level:
         The level of this block within the overall block structure.
         The outermost block, corresponding to the root of the tree,
@@ -92,16 +164,84 @@ class Block:
         - its colour is not None.
     - level <= max_depth
     """
-    position: Tuple[int, int]
+    # === Private Attributes ===
+    # _colour:
+    #   The index in PALETTE of this Block's colour, or None if it is
+    #   subdivided. Storing a small int instead of a tuple makes comparing
+    #   colours cheaper, and the tuple is only looked up when it is read.
+    # _children:
+    #   The children of this Block before <_transform> is applied to them.
+    # _transform:
+    #   A transform from _TRANSFORMS of this Block's subtree that has not been
+    #   carried out yet. It is pushed down to the children, one level at a
+    #   time, the next time they are read.
+    # _parent:
+    #   The Block that has this Block as a child, or None if this Block is the
+    #   root of its tree.
+    # _position:
+    #   The position of this Block if it is a root. Otherwise, the position
+    #   last worked out from its parent, which is only up to date if
+    #   <_position_version> is equal to Block._layout_version.
+    # _position_version:
+    #   The value of Block._layout_version when <_position> was worked out.
+    #
+    # A Block's position is not stored but worked out from its parent's
+    # position and its index among its parent's children, and cached until
+    # the next move that rearranges blocks. A move therefore only has to
+    # relink children: rotate records the rotation in <_transform> and swap
+    # reorders the four children, both in constant time. Reading <children>
+    # carries out the pending transform for that one Block, so code only
+    # pays for the parts of the tree it visits.
+    # _fingerprints:
+    #   The fingerprint of this subdivided Block after each of the transforms
+    #   in _TRANSFORMS is applied to it, in the same order, or None if they
+    #   have not been worked out since the last move inside this Block. It is
+    #   always None for a leaf, whose fingerprints are in _LEAF_FINGERPRINTS.
+    #
+    # A Block's fingerprint is the sum, modulo 2^64, of one Zobrist-style key
+    # per leaf: the product of the 'leaf' key for its level and colour and
+    # the 'slot' keys along its path from this Block, plus a 'parent' key for
+    # each subdivided block. A move inside a Block forgets the fingerprints
+    # of that Block and its ancestors, and they are worked out again from the
+    # fingerprints of their children when next asked for, so only the blocks
+    # along the path are recomputed. Keeping a fingerprint for every
+    # orientation lets rotate update the fingerprint without visiting the
+    # rotated blocks.
+    #
+    # _grid:
+    #   The grid.BoardGrid attached to this Block, or None. Only the root of a
+    #   board has a grid, and every move inside the board patches it.
+    #
+    # _moves:
+    #   The moves.MoveIndex attached to this Block, or None. Like _grid, only
+    #   the root of a board has one, and it is told whenever the colour or
+    #   children of a block inside the board change.
+    #
+    # Blocks use __slots__ instead of a __dict__, since a deep board has
+    # hundreds of thousands of them.
+    __slots__ = ('size', 'level', 'max_depth', '_colour', '_children',
+                 '_transform', '_parent', '_position', '_position_version',
+                 '_fingerprints', '_grid', '_moves')
     size: int
-    colour: Optional[Tuple[int, int, int]]
     level: int
     max_depth: int
-    children: List[Block]
+    _colour: Optional[int]
+    _children: List[Block]
+    _transform: Tuple[int, ...]
+    _parent: Optional[Block]
+    _position: Tuple[int, int]
+    _position_version: int
+    _fingerprints: Optional[Tuple[int, ...]]
+    _grid: Optional[Any]
+    _moves: Optional[Any]
+
+    # Incremented whenever blocks are rearranged, which makes every cached
+    # position out of date.
+    _layout_version = 0
 
     def __init__(self, position: Tuple[int, int], size: int,
-                 colour: Optional[Tuple[int, int, int]], level: int,
-                 max_depth: int) -> None:
+                 colour: Optional[Union[int, Tuple[int, int, int]]],
+                 level: int, max_depth: int) -> None:
         """Initialize this block with <position>, dimensions <size> by <size>,
         the given <colour>, at <level>, and with no children.
 
@@ -111,12 +251,18 @@ class Block:
             - level >= 0
             - max_depth >= level
         """
-        self.position = position
         self.size = size
-        self.colour = colour
         self.level = level
         self.max_depth = max_depth
-        self.children = []
+        self._children = []
+        self._transform = _IDENTITY
+        self._parent = None
+        self._position = position
+        self._position_version = Block._layout_version
+        self._fingerprints = None
+        self._grid = None
+        self._moves = None
+        self.colour = colour
 
     def __str__(self) -> str:
         """Return this Block in a string format.
@@ -125,43 +271,297 @@ class Block:
         >>> str(block)
         'Leaf: colour=Black, pos=(0, 0), size=750, level=0\\n'
         """
-        if len(self.children) == 0:
-            indents = '\t' * self.level
-            colour = colour_name(self.colour)
-            return f'{indents}Leaf: colour={colour}, pos={self.position}, ' \
-                   f'size={self.size}, level={self.level}\n'
-        else:
-            indents = '\t' * self.level
-            result = f'{indents}Parent: pos={self.position},' \
-                     f'size={self.size}, level={self.level}\n'
+        result = io.StringIO()
+        self.write_to(result)
+        return result.getvalue()
 
-            for child in self.children:
-                result += str(child)
+    def write_to(self, file: TextIO) -> None:
+        """Write this Block to <file> in the same format as str, one line at a
+        time, so that the whole string is never built.
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            indents = '\t' * block.level
+            if len(block.children) == 0:
+                colour = colour_name(block.colour)
+                file.write(f'{indents}Leaf: colour={colour}, '
+                           f'pos={block.position}, size={block.size}, '
+                           f'level={block.level}\n')
+            else:
+                file.write(f'{indents}Parent: pos={block.position},'
+                           f'size={block.size}, level={block.level}\n')
+                stack.extend(reversed(block.children))
+
+    def iter_leaves(self) -> Iterator[Block]:
+        """Yield the undivided blocks in this Block, from left to right in the
+        order of the children (upper-right, upper-left, lower-left,
+        lower-right) at every level.
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            children = block.children
+            if children:
+                stack.extend(reversed(children))
+            else:
+                yield block
 
-            return result
+    def iter_level(self, level: int) -> Iterator[Block]:
+        """Yield the blocks in this Block that are at <level>, in the same
+        order as iter_leaves. Blocks below <level> are never visited.
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            if block.level == level:
+                yield block
+            elif block.level < level:
+                stack.extend(reversed(block.children))
+
+    def iter_rect(self, x: int, y: int, width: int, height: int) \
+            -> Iterator[Block]:
+        """Yield the undivided blocks in this Block that overlap the rectangle
+        whose upper left corner is (<x>, <y>) and whose dimensions are <width>
+        by <height>, in the same order as iter_leaves.
+
+        Only the blocks that overlap the rectangle are visited.
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            left, top = block.position
+            if left < x + width and x < left + block.size and \
+                    top < y + height and y < top + block.size:
+                children = block.children
+                if children:
+                    stack.extend(reversed(children))
+                else:
+                    yield block
 
     def __eq__(self, other: Block) -> bool:
         """Return True iff this Block and all its descendents are equivalent to
         the <other> Block and all its descendents.
         """
-        if len(self.children) == 0 and len(other.children) == 0:
-            # Both self and other are leaves.
-            return self.position == other.position and \
-                   self.size == other.size and \
-                   self.colour == other.colour and \
-                   self.level == other.level and \
-                   self.max_depth == other.max_depth
-        elif len(self.children) != len(other.children):
-            # One of self or other is a leaf while the other is not.
+        if self.position != other.position:
             return False
+        # The position of every descendant follows from this Block's position
+        # and the descendant's place among the children, so once the trees
+        # are known to have the same shape their positions are equal too
+        stack = [(self, other)]
+        while stack:
+            block, other_block = stack.pop()
+            if block._fingerprints is not None and \
+                    other_block._fingerprints is not None and \
+                    block._fingerprints[0] != other_block._fingerprints[0]:
+                # Blocks with different fingerprints are never equal. They
+                # are only compared when both are already known, since
+                # working them out would visit both trees anyway
+                return False
+            children = block.children
+            other_children = other_block.children
+            if len(children) != len(other_children):
+                # One of them is a leaf while the other is not.
+                return False
+            if children:
+                stack.extend(zip(children, other_children))
+            elif block.size != other_block.size or \
+                    block._colour != other_block._colour or \
+                    block.level != other_block.level or \
+                    block.max_depth != other_block.max_depth:
+                return False
+        return True
+
+    def __hash__(self) -> int:
+        """Return a hash of this Block based on its fingerprint.
+
+        Since moves change the fingerprint, a Block should not be changed while
+        it is a key of a dict or an element of a set.
+        """
+        return hash(self.fingerprint())
+
+    def fingerprint(self) -> int:
+        """Return a 64-bit fingerprint of this Block and its descendants.
+
+        Blocks that are equal have the same fingerprint. The fingerprint does
+        not depend on positions, so a subtree has the same fingerprint
+        wherever it is on the board. It is kept up to date by every move, and
+        after a move only the blocks from the moved block up to this one are
+        recomputed.
+        """
+        return self._orientation_fingerprints()[0]
+
+    def _orientation_fingerprints(self) -> Tuple[int, ...]:
+        """Return the fingerprints of this Block after each transform in
+        _TRANSFORMS, working them out if they are not known.
+        """
+        if self._fingerprints is None:
+            children = self.children
+            if len(children) != 4:
+                key = (self.level, self._colour)
+                if key not in _LEAF_FINGERPRINTS:
+                    _LEAF_FINGERPRINTS[key] = \
+                        (_key('leaf', self.level, self._colour),) * 8
+                return _LEAF_FINGERPRINTS[key]
+            level = self.level
+            slots = [_key('slot', level, i) for i in range(4)]
+            below = [child._orientation_fingerprints()
+                     for child in children]
+            fingerprints = []
+            for k in range(8):
+                transform = _TRANSFORMS[k]
+                total = _key('parent', level, 0)
+                for i in range(4):
+                    total += slots[i] * below[transform[i]][k]
+                fingerprints.append(total & _MASK)
+            self._fingerprints = tuple(fingerprints)
+        return self._fingerprints
+
+    def _forget_fingerprints(self) -> None:
+        """Forget the fingerprints of this Block and its ancestors, since
+        something inside this Block has changed.
+        """
+        self._fingerprints = None
+        block = self._parent
+        while block is not None and block._fingerprints is not None:
+            block._fingerprints = None
+            block = block._parent
+
+    @property
+    def colour(self) -> Optional[Tuple[int, int, int]]:
+        """The colour of this Block, or None if it is subdivided.
+        """
+        if self._colour is None:
+            return None
+        return PALETTE[self._colour]
+
+    @colour.setter
+    def colour(self, colour: Optional[Union[int, Tuple[int, int, int]]]) \
+            -> None:
+        if colour is None or isinstance(colour, int):
+            self._colour = colour
         else:
-            # Both self and other have four children.
-            for i in range(4):
-                # The != operator also uses the __eq__ special method.
-                if self.children[i] != other.children[i]:
-                    return False
+            self._colour = colour_index(colour)
+        self._forget_fingerprints()
+        self._refilled()
+
+    @property
+    def colour_index(self) -> Optional[int]:
+        """The index of this Block's colour in PALETTE, or None if it is
+        subdivided.
+        """
+        return self._colour
 
-            return True
+    @property
+    def position(self) -> Tuple[int, int]:
+        """The (x, y) coordinates of the upper left corner of this Block.
+        """
+        parent = self._parent
+        if parent is None or self._position_version == Block._layout_version:
+            return self._position
+
+        # The parent's position has to be worked out first, since doing so
+        # pushes down any transforms pending on its ancestors
+        x, y = parent.position
+        siblings = parent.children
+        for i in range(len(siblings)):
+            if siblings[i] is self:
+                half = parent._child_size()
+                if i in (0, 3):  # a right child
+                    x += half
+                if i in (2, 3):  # a lower child
+                    y += half
+                self._position = (x, y)
+                self._position_version = Block._layout_version
+        # If this Block has been removed from its parent, it keeps the last
+        # position it had
+        return self._position
+
+    @position.setter
+    def position(self, position: Tuple[int, int]) -> None:
+        self._position = position
+        self._position_version = Block._layout_version
+
+    @property
+    def children(self) -> List[Block]:
+        """The blocks into which this block is subdivided, in the order
+        upper-right, upper-left, lower-left, lower-right.
+        """
+        if self._transform is not _IDENTITY:
+            self._resolve()
+        children = self._children
+        if children and children[-1]._parent is not self:
+            # Some children were added to the list directly
+            for child in children:
+                child._parent = self
+        return children
+
+    @children.setter
+    def children(self, children: List[Block]) -> None:
+        self._settle()
+        for child in children:
+            child._parent = self
+        self._children = children
+        self._transform = _IDENTITY
+        self._forget_fingerprints()
+        Block._layout_version += 1
+        self._refilled()
+
+    def _resolve(self) -> None:
+        """Carry out the transform pending on this Block, pushing it down to
+        its children.
+        """
+        transform = self._transform
+        children = self._children
+        self._transform = _IDENTITY
+        if len(children) == 4:
+            children = [children[transform[0]], children[transform[1]],
+                        children[transform[2]], children[transform[3]]]
+            for child in children:
+                child._transform = _COMPOSITION[child._transform, transform]
+                child._parent = self
+                if child._fingerprints is not None:
+                    child._fingerprints = _reorient(child._fingerprints,
+                                                    transform)
+            self._children = children
+
+    def _settle(self) -> None:
+        """Carry out every transform pending on the ancestors of this Block,
+        so that this Block's own transform and children are the ones on the
+        board.
+
+        A move must do this before it changes the Block, since a transform
+        still pending above it would otherwise be applied to the result.
+        """
+        ancestors = []
+        parent = self._parent
+        while parent is not None:
+            ancestors.append(parent)
+            parent = parent._parent
+        for ancestor in reversed(ancestors):
+            if ancestor._transform is not _IDENTITY:
+                ancestor._resolve()
+
+    def _attached_grid(self) -> Optional[Any]:
+        """Return the grid attached to the root of this Block's tree, or None
+        if there is none.
+        """
+        block = self
+        while block._parent is not None:
+            block = block._parent
+        return block._grid
+
+    def _refilled(self) -> None:
+        """Tell the grid and the move index attached to the root of this
+        Block's tree, if any, that this Block's colour or children changed.
+        """
+        root = self
+        while root._parent is not None:
+            root = root._parent
+        if root._grid is not None:
+            root._grid.refill(self)
+        if root._moves is not None:
+            root._moves.refill(self)
 
     def _child_size(self) -> int:
         """Return the size of this Block's children.
@@ -180,23 +580,6 @@ class Block:
 
         return [(x + size, y), (x, y), (x, y + size), (x + size, y + size)]
 
-    def _update_children_positions(self, position: Tuple[int, int]) -> None:
-        """Set the position of this Block to <position> and update all its
-        descendants to have positions consistent with this Block's.
-
-        <position> is the (x, y) coordinates of the upper-left corner of this
-        Block.
-        """
-        self.position = position  # setting the new position
-        if len(self.children) == 4:  # we need to change the position of
-            # the children too
-            new_positions = self._children_positions()
-
-            self.children[0]._update_children_positions(new_positions[0])
-            self.children[1]._update_children_positions(new_positions[1])
-            self.children[2]._update_children_positions(new_positions[2])
-            self.children[3]._update_children_positions(new_positions[3])
-
     def smashable(self) -> bool:
         """Return True iff this block can be smashed.
 
@@ -205,6 +588,75 @@ class Block:
         """
         return self.level != self.max_depth and len(self.children) == 0
 
+    # The can_ methods below answer whether a move would succeed on this
+    # Block without making it, so none of them changes or copies any Block.
+
+    def can_smash(self) -> bool:
+        """Return True iff smash would sub-divide this Block. This is the same
+        as smashable, named like the other checks.
+        """
+        return self.smashable()
+
+    def can_swap(self) -> bool:
+        """Return True iff swap would swap this Block's children, which is iff
+        it has children.
+        """
+        return len(self._children) == 4
+
+    def can_rotate(self) -> bool:
+        """Return True iff rotate would rotate this Block, which is iff it has
+        children.
+        """
+        return len(self._children) == 4
+
+    def can_paint(self, colour: Union[int, Tuple[int, int, int]]) -> bool:
+        """Return True iff paint would change this Block's colour to <colour>,
+        which is either a colour or its index in PALETTE.
+        """
+        if not isinstance(colour, int):
+            colour = colour_index(colour)
+        return self.level == self.max_depth and self._colour != colour
+
+    def combine_colour(self) -> Optional[Tuple[int, int, int]]:
+        """Return the colour this Block would become if it were combined, or
+        None if it cannot be combined.
+
+        >>> from settings import COLOUR_LIST
+        >>> block = Block((0, 0), 750, None, 0, 1)
+        >>> block.children = [Block((0, 0), 375, COLOUR_LIST[i], 1, 1)
+        ...                   for i in [0, 1, 1, 2]]
+        >>> block.combine_colour() == COLOUR_LIST[1]
+        True
+        """
+        majority = self._majority()
+        return None if majority is None else PALETTE[majority]
+
+    def can_combine(self) -> bool:
+        """Return True iff combine would turn this Block into a leaf.
+        """
+        return self._majority() is not None
+
+    def _majority(self) -> Optional[int]:
+        """Return the index in PALETTE of the colour this Block would become
+        if it were combined, or None if it cannot be combined.
+        """
+        if len(self.children) != 4 or self.level != self.max_depth - 1:
+            return None
+        temp_colour_lst = []
+        best_colour = []  # This holds the possible colour majorities
+        for i in range(4):
+            this_child = self.children[i]
+            if this_child._colour in temp_colour_lst and \
+                    this_child._colour not in best_colour:
+                # this means more than 1 child has the same colour so this
+                # colour could be a majority
+                best_colour.append(this_child._colour)
+            else:
+                temp_colour_lst.append(this_child._colour)
+        if len(best_colour) == 1:  # One colour has the majority
+            return best_colour[0]
+        return None
+
     def smash(self) -> bool:
         """Sub-divide this block so that it has four randomly generated
         children.
@@ -216,12 +668,16 @@ class Block:
         """
         if not self.smashable():
             return False
+        self._settle()
+        self._transform = _IDENTITY  # a leaf has nothing to transform
+        self._forget_fingerprints()
         pos = self._children_positions()
         size = self._child_size()  # This is the size of every new block
 
         for i in range(4):  # making 4 new blocks when smash() is called
-            col = random.choice(COLOUR_LIST)
+            col = random.randrange(len(COLOUR_LIST))  # an index into PALETTE
             new_block = Block(pos[i], size, col, self.level + 1, self.max_depth)
+            new_block._parent = self
             self.children.append(new_block)
             num = random.random()
             if num < math.exp(-0.25 * new_block.level):
@@ -241,43 +697,24 @@ class Block:
 
         Precondition: <direction> is either 0 or 1
         """
-        if len(self.children) != 4:
+        self._settle()
+        children = self.children
+        if len(children) != 4:
             # This is for when swapping isn't possible
             return False
 
-        new_pos = self._children_positions()
-        if direction == 0:
-            # Changing the positions of the blocks
-            self.children[0]._update_children_positions(new_pos[1])
-            self.children[1]._update_children_positions(new_pos[0])
-            self.children[2]._update_children_positions(new_pos[3])
-            self.children[3]._update_children_positions(new_pos[2])
-
-            # Changing the order of the children to uphold the representation
-            # invariant saying the child at index 0 is in the top right and so
-            # on
-            copy = self.create_copy()
-            self.children[0] = copy.children[1]
-            self.children[1] = copy.children[0]
-            self.children[2] = copy.children[3]
-            self.children[3] = copy.children[2]
-
-        else:
-            # Changing the positions of the blocks
-            self.children[0]._update_children_positions(new_pos[3])
-            self.children[1]._update_children_positions(new_pos[2])
-            self.children[2]._update_children_positions(new_pos[1])
-            self.children[3]._update_children_positions(new_pos[0])
-
-            # Changing the order of the children to uphold the representation
-            # invariant saying the child at index 0 is in the top right and so
-            # on
-            copy = self.create_copy()
-            self.children[0] = copy.children[3]
-            self.children[1] = copy.children[2]
-            self.children[2] = copy.children[1]
-            self.children[3] = copy.children[0]
-
+        # Changing the order of the children to uphold the representation
+        # invariant saying the child at index 0 is in the top right and so on.
+        # The same Block objects are kept so that references to them stay
+        # valid, and their positions follow from their new indices
+        order = _SWAP_ORDER[direction]
+        self._children = [children[order[0]], children[order[1]],
+                          children[order[2]], children[order[3]]]
+        self._forget_fingerprints()
+        Block._layout_version += 1
+        grid = self._attached_grid()
+        if grid is not None:
+            grid.swapped(self, direction)
         return True
 
     def rotate(self, direction: int) -> bool:
@@ -290,56 +727,41 @@ class Block:
 
         Precondition: <direction> is either 1 or 3.
         """
-        if len(self.children) != 4:
+        if not self.can_rotate():
             return False
-
-        new_pos = self._children_positions()
-        if direction == 3:
-            # Changing the positions of the blocks
-            self.children[0]._update_children_positions(new_pos[1])
-            self.children[1]._update_children_positions(new_pos[2])
-            self.children[2]._update_children_positions(new_pos[3])
-            self.children[3]._update_children_positions(new_pos[0])
-
-            # Changing the order of the children to uphold the representation
-            # invariant saying the child at index 0 is in the top right and so
-            # on
-            copy = self.create_copy()
-            self.children[0] = copy.children[3]
-            self.children[1] = copy.children[0]
-            self.children[2] = copy.children[1]
-            self.children[3] = copy.children[2]
-        else:
-            # Changing the positions of the blocks
-            self.children[0]._update_children_positions(new_pos[3])
-            self.children[1]._update_children_positions(new_pos[0])
-            self.children[2]._update_children_positions(new_pos[1])
-            self.children[3]._update_children_positions(new_pos[2])
-
-            # Changing the order of the children to uphold the representation
-            # invariant saying the child at index 0 is in the top right and so
-            # on
-            copy = self.create_copy()
-            self.children[0] = copy.children[1]
-            self.children[1] = copy.children[2]
-            self.children[2] = copy.children[3]
-            self.children[3] = copy.children[0]
-
-        # This method is recursive so I need to rotate the children as well
-        self.children[0].rotate(direction)
-        self.children[1].rotate(direction)
-        self.children[2].rotate(direction)
-        self.children[3].rotate(direction)
+        self._settle()
+
+        # The rotation is only recorded here. It is carried out one level at a
+        # time as the descendants are read
+        self._transform = _COMPOSITION[self._transform,
+                                       _ROTATION[direction]]
+        if self._fingerprints is not None:
+            # The rotated fingerprints are already known, so only the
+            # ancestors have to be recomputed
+            fingerprints = _reorient(self._fingerprints, _ROTATION[direction])
+            if self._parent is not None:
+                self._parent._forget_fingerprints()
+            self._fingerprints = fingerprints
+        Block._layout_version += 1
+        grid = self._attached_grid()
+        if grid is not None:
+            grid.rotated(self, direction)
         return True
 
-    def paint(self, colour: Tuple[int, int, int]) -> bool:
+    def paint(self, colour: Union[int, Tuple[int, int, int]]) -> bool:
         """Change this Block's colour iff it is a leaf at a level of max_depth
         and its colour is different from <colour>.
 
+        <colour> is either a colour or its index in PALETTE.
+
         Return True iff this Block's colour was changed.
         """
-        if self.level == self.max_depth and self.colour != colour:
-            self.colour = colour
+        if not isinstance(colour, int):
+            colour = colour_index(colour)
+        if self.can_paint(colour):
+            self._colour = colour
+            self._forget_fingerprints()
+            self._refilled()
             return True
         return False
 
@@ -356,22 +778,10 @@ class Block:
 
         Return True iff this Block was turned into a leaf node.
         """
-        if len(self.children) != 4 or self.level != self.max_depth - 1:
-            return False
-        temp_colour_lst = []
-        best_colour = []  # This holds the possible colour majorities
-        for i in range(4):
-            this_child = self.children[i]
-            if this_child.colour in temp_colour_lst and \
-                    this_child.colour not in best_colour:
-                # this means more than 1 child has the same colour so this
-                # colour could be a majority
-                best_colour.append(this_child.colour)
-            else:
-                temp_colour_lst.append(this_child.colour)
-        if len(best_colour) == 1:  # One colour has the majority
+        majority = self._majority()
+        if majority is not None:
             self.children = []  # upholding the representation invariants
-            self.colour = best_colour[0]
+            self.colour = majority
             return True
         return False
 
@@ -383,18 +793,156 @@ class Block:
         pos = self.position
         col = self.colour
         new_block = Block(pos, self.size, col, self.level, self.max_depth)
-        if len(self.children) == 4:  # recursing on the children
-            for child in self.children:
-                new_block.children.append(child.create_copy())
+        self._copy_children(new_block)
+        new_block._fingerprints = self._fingerprints
         return new_block
 
+    def _copy_children(self, new_block: Block) -> None:
+        """Give <new_block> deep copies of this Block's children.
+
+        The pending transform, cached positions and fingerprints are copied as
+        they are, so copying does not force them to be worked out.
+        """
+        if len(self._children) == 4:  # recursing on the children
+            children = []
+            for child in self._children:
+                copy = Block(child._position, child.size, child._colour,
+                             child.level, child.max_depth)
+                copy._position_version = child._position_version
+                copy._fingerprints = child._fingerprints
+                copy._parent = new_block
+                child._copy_children(copy)
+                children.append(copy)
+            new_block._children = children
+            new_block._transform = self._transform
+
+
+class MoveJournal:
+    """A record of the moves applied to a board, which can be undone and
+    redone in place.
+
+    Applying a move through a journal and then undoing it leaves the board
+    exactly as it was, down to the identity of every Block in it. This lets
+    a player try a move, score the board, and undo the move again without
+    ever copying the board.
+
+    Each entry in the journal is a tuple of the Block that was acted on, the
+    action from actions.py, and whatever is needed to reverse it:
+        - rotate and swap need nothing, since they have inverse moves
+        - smash saves the children it generated, so that redo can put the
+          same random children back
+        - combine saves the children it removed
+        - paint saves the colour that was painted over and the new colour
+    """
+    # === Private Attributes ===
+    # _done:
+    #   The moves that have been applied, most recent last.
+    # _undone:
+    #   The moves that have been undone since the last apply, most recently
+    #   undone last.
+    _done: List[Tuple[Block, Tuple[str, Optional[int]], object]]
+    _undone: List[Tuple[Block, Tuple[str, Optional[int]], object]]
+
+    def __init__(self) -> None:
+        """Initialize an empty journal.
+        """
+        self._done = []
+        self._undone = []
+
+    def __len__(self) -> int:
+        """Return the number of moves that can be undone.
+        """
+        return len(self._done)
+
+    def apply(self, block: Block, action: Tuple[str, Optional[int]],
+              colour: Optional[Tuple[int, int, int]] = None) -> bool:
+        """Do <action> to <block> and record it in this journal.
+
+        <colour> is the colour used by a paint action. Return True iff the
+        move was performed. A move that is not performed is not recorded.
+        """
+        name, direction = action
+        saved = None
+        if name == 'rotate':
+            success = block.rotate(direction)
+        elif name == 'swap':
+            success = block.swap(direction)
+        elif name == 'smash':
+            saved = block.colour
+            success = block.smash()
+        elif name == 'combine':
+            # The children are saved in the order they have on the board, so
+            # the transforms pending above <block> are carried out first
+            block._settle()
+            saved = block.children
+            success = block.combine()
+        elif name == 'paint':
+            saved = (block.colour, colour)
+            success = block.paint(colour)
+        else:
+            success = False
+
+        if success:
+            if name == 'smash':
+                saved = (saved, block.children)
+            self._done.append((block, action, saved))
+            self._undone = []
+        return success
+
+    def undo(self) -> bool:
+        """Undo the most recent move in this journal.
+
+        Return True iff there was a move to undo.
+        """
+        if len(self._done) == 0:
+            return False
+        block, action, saved = self._done.pop()
+        name, direction = action
+        if name == 'rotate':
+            block.rotate(4 - direction)
+        elif name == 'swap':
+            block.swap(direction)
+        elif name == 'smash':
+            block.colour = saved[0]
+            block.children = []
+        elif name == 'combine':
+            block.colour = None
+            block.children = saved
+        else:
+            block.colour = saved[0]
+        self._undone.append((block, action, saved))
+        return True
+
+    def redo(self) -> bool:
+        """Redo the most recently undone move, exactly as it was first done.
+
+        Return True iff there was a move to redo.
+        """
+        if len(self._undone) == 0:
+            return False
+        block, action, saved = self._undone.pop()
+        name, direction = action
+        if name == 'rotate':
+            block.rotate(direction)
+        elif name == 'swap':
+            block.swap(direction)
+        elif name == 'smash':
+            block.colour = None
+            block.children = saved[1]
+        elif name == 'combine':
+            block.combine()
+        else:
+            block.paint(saved[1])
+        self._done.append((block, action, saved))
+        return True
+
 
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
-            'settings'
+            'io', 'settings'
         ],
         'max-attributes': 15,
         'max-args': 6
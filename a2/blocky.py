@@ -29,6 +29,8 @@ import pygame
 from actions import ACTION_MESSAGE, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE,\
     SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE, ACTION_PENALTY
 from block import Block
+from goal import fused_score
+from grid import attach_grid
 from player import Player
 from renderer import Renderer
 from settings import ANIMATION_DURATION
@@ -48,14 +50,8 @@ def _block_to_squares(board: Block) -> List[Tuple[Tuple[int, int, int],
 
     The order of the squares does not matter.
     """
-    if len(board.children) == 0:  # There is only one block
-        new_tup = (board.colour, board.position, board.size)
-        return [new_tup]
-    else:  # recursion
-        total = []
-        for new_block in board.children:
-            total.extend(_block_to_squares(new_block))
-        return total
+    return [(block.colour, block.position, block.size)
+            for block in board.iter_leaves()]
 
 
 class GameData:
@@ -75,16 +71,30 @@ class GameData:
         The number of combines done by each player.
     paints:
         The number of paints done by each player.
+    board_version:
+        The number of moves that have changed the board.
+    score_hits:
+        The number of goal scores that calculate_score found in its cache.
+    score_misses:
+        The number of goal scores that calculate_score had to work out.
 
     === Representation Invariants ===
     - len(players) >= 1
     """
+    # === Private Attributes ===
+    # _scores:
+    #   The goal scores worked out since the board last changed, keyed by
+    #   (goal type, goal colour index, board_version).
     max_turns: int
     board: Block
     players: List[Player]
     smashes: Dict[int, int]
     combines: Dict[int, int]
     paints: Dict[int, int]
+    board_version: int
+    score_hits: int
+    score_misses: int
+    _scores: Dict[Tuple[type, int, int], int]
 
     def __init__(self, board: Block, players: List[Player]) -> None:
         """Initialize the game data, saving a reference to <board> and
@@ -96,6 +106,9 @@ class GameData:
         self.max_turns = 0
         self.board = board
         self.players = players
+        # Keep a flattened copy of the board up to date as moves are made,
+        # so that scoring does not flatten the board every time
+        attach_grid(board)
 
         self.smashes = {}
         self.combines = {}
@@ -107,12 +120,33 @@ class GameData:
             self.combines[player.id] = 0
             self.paints[player.id] = 0
 
+        self.board_version = 0
+        self.score_hits = 0
+        self.score_misses = 0
+        self._scores = {}
+
+    def board_changed(self) -> None:
+        """Record that a move has changed the board, so that the scores that
+        were cached for it are out of date.
+        """
+        self.board_version += 1
+        # Versions only go up, so the old scores can never be used again
+        self._scores = {}
+
     def calculate_score(self, player_id: int) -> Tuple[int, int]:
         """Return a tuple containing first the <player_id>'s score based on
         their goal in the game and second the deductions from their score based
         on the actions they've taken.
         """
-        goal_score = self.players[player_id].goal.score(self.board)
+        goal = self.players[player_id].goal
+        key = (type(goal), goal.colour_index, self.board_version)
+        if key in self._scores:
+            self.score_hits += 1
+        else:
+            self.score_misses += 1
+            # Every player's goal is scored in one pass over the board
+            self._scores[key] = fused_score(self.board, goal)
+        goal_score = self._scores[key]
 
         penalty = self.smashes[player_id] * ACTION_PENALTY[SMASH] + \
             self.combines[player_id] * ACTION_PENALTY[COMBINE] + \
@@ -214,6 +248,8 @@ class MainState(GameState):
             move_successful = True
 
         if move_successful:
+            if action != PASS:
+                self._data.board_changed()
             self._update_player()
 
         return move_successful
@@ -372,7 +408,7 @@ if __name__ == '__main__':
         'allowed-io': ['run_game'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'pygame', '__future__',
-            'block', 'player', 'renderer', 'settings', 'actions'
+            'block', 'goal', 'grid', 'player', 'renderer', 'settings', 'actions'
         ],
         'generated-members': 'pygame.*'
     })
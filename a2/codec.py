@@ -0,0 +1,234 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains functions that turn a Blocky board into a compact string
+of bytes and back, and classes that write and read files holding many
+boards.
+
+An encoded board starts with a 4-byte header: the size of the board (2
+bytes), its max_depth (1 byte) and the number of bits used for each colour
+(1 byte). It is followed by the blocks of the board in preorder, each parent
+before its four children and the children in the same order as
+Block.children:
+    - a block above max_depth starts with 1 bit, which is 1 iff the block is
+      subdivided. A block at max_depth cannot be subdivided, so it has no
+      such bit.
+    - an undivided block is followed by the index of its colour in PALETTE.
+The last byte is padded with 0 bits.
+
+Colours are stored in 2 bits, unless PALETTE has grown past 4 colours. The
+colours in COLOUR_LIST have the same index in every run, but any other colour
+only has an index in the run that added it to PALETTE.
+
+A file of boards holds each encoded board after its length in bytes, which is
+written 7 bits per byte with the high bit set on every byte but the last.
+"""
+from __future__ import annotations
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+import pickle
+import time
+
+from block import Block, generate_board
+from settings import PALETTE
+
+# The number of bytes in the header of an encoded board.
+_HEADER_SIZE = 4
+
+
+def _colour_bits() -> int:
+    """Return the number of bits needed to store the index of any colour in
+    PALETTE, which is at least 2.
+    """
+    return max(2, (len(PALETTE) - 1).bit_length())
+
+
+def encode(board: Block) -> bytes:
+    """Return <board> encoded as bytes.
+
+    Precondition: board.level == 0
+
+    >>> from settings import COLOUR_LIST
+    >>> encode(Block((0, 0), 750, COLOUR_LIST[1], 0, 1))
+    b'\\x02\\xee\\x01\\x02 '
+    """
+    width = _colour_bits()
+    colour_format = f'0{width}b'
+    bits = []
+    stack = [board]
+    while stack:
+        block = stack.pop()
+        children = block.children
+        if block.level != block.max_depth:
+            bits.append('1' if children else '0')
+        if children:
+            stack.extend(reversed(children))
+        else:
+            bits.append(format(block.colour_index, colour_format))
+
+    stream = ''.join(bits)
+    num_bytes = (len(stream) + 7) // 8
+    stream = stream.ljust(8 * num_bytes, '0')
+    header = bytes([board.size >> 8, board.size & 255, board.max_depth,
+                    width])
+    return header + int(stream, 2).to_bytes(num_bytes, 'big')
+
+
+def decode(data: bytes) -> Block:
+    """Return the board encoded in <data> by encode.
+    """
+    size = (data[0] << 8) | data[1]
+    max_depth = data[2]
+    width = data[3]
+    payload = data[_HEADER_SIZE:]
+    stream = format(int.from_bytes(payload, 'big'), f'0{8 * len(payload)}b')
+
+    # Each block is made once its first bits are read, so that it can be
+    # given its colour straight away. The positions are passed down with the
+    # blocks, since asking a new block for its position would walk up to the
+    # root.
+    root = []
+    read = 0
+    stack = [(root, 0, 0, size, 0)]
+    while stack:
+        siblings, x, y, block_size, level = stack.pop()
+        if level != max_depth and stream[read] == '1':
+            read += 1
+            block = Block((x, y), block_size, None, level, max_depth)
+            half = round(block_size / 2.0)
+            children = block.children
+            stack.extend([(children, x + half, y + half, half, level + 1),
+                          (children, x, y + half, half, level + 1),
+                          (children, x, y, half, level + 1),
+                          (children, x + half, y, half, level + 1)])
+        else:
+            if level != max_depth:
+                read += 1
+            block = Block((x, y), block_size,
+                          int(stream[read:read + width], 2), level, max_depth)
+            read += width
+        siblings.append(block)
+    return root[0]
+
+
+class BoardWriter:
+    """Writes boards one after another to a binary file.
+
+    === Public Attributes ===
+    file:
+        The file the boards are written to. It is not closed by the writer.
+    count:
+        The number of boards written so far.
+    """
+    file: BinaryIO
+    count: int
+
+    def __init__(self, file: BinaryIO) -> None:
+        """Initialize a writer that writes boards to <file>.
+        """
+        self.file = file
+        self.count = 0
+
+    def write(self, board: Block) -> None:
+        """Write <board> to the end of this writer's file.
+        """
+        data = encode(board)
+        length = len(data)
+        prefix = []
+        while length >= 128:
+            prefix.append(128 | (length & 127))
+            length >>= 7
+        prefix.append(length)
+        self.file.write(bytes(prefix))
+        self.file.write(data)
+        self.count += 1
+
+
+class BoardReader:
+    """Reads the boards written by a BoardWriter, in the same order.
+
+    === Public Attributes ===
+    file:
+        The file the boards are read from. It is not closed by the reader.
+    """
+    file: BinaryIO
+
+    def __init__(self, file: BinaryIO) -> None:
+        """Initialize a reader that reads boards from <file>.
+        """
+        self.file = file
+
+    def __iter__(self) -> Iterator[Block]:
+        """Yield the boards left in this reader's file, one at a time.
+        """
+        board = self.read()
+        while board is not None:
+            yield board
+            board = self.read()
+
+    def read(self) -> Optional[Block]:
+        """Return the next board in this reader's file, or None if there are
+        no boards left.
+        """
+        length = 0
+        shift = 0
+        byte = self.file.read(1)
+        if not byte:
+            return None
+        while byte[0] & 128:
+            length |= (byte[0] & 127) << shift
+            shift += 7
+            byte = self.file.read(1)
+        length |= byte[0] << shift
+        return decode(self.file.read(length))
+
+
+def benchmark(num_boards: int = 1000, max_depth: int = 5) \
+        -> List[Tuple[str, float, float, float]]:
+    """Encode and decode <num_boards> random boards with a depth of
+    <max_depth>, both with this module and with pickle.
+
+    Return a row (method, mean bytes per board, seconds to encode all the
+    boards, seconds to decode them) for each method.
+    """
+    boards = [generate_board(max_depth, 750) for _ in range(num_boards)]
+    rows = []
+    for name, dump, load in [('codec', encode, decode),
+                             ('pickle', pickle.dumps, pickle.loads)]:
+        start = time.perf_counter()
+        encoded = [dump(board) for board in boards]
+        middle = time.perf_counter()
+        for data in encoded:
+            load(data)
+        end = time.perf_counter()
+        rows.append((name, sum(len(data) for data in encoded) / num_boards,
+                     middle - start, end - middle))
+    return rows
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'time',
+            'pickle', 'block', 'settings'
+        ],
+        'max-attributes': 15
+    })
@@ -24,16 +24,28 @@ Please use this as a starting point to check your work and write your own
 tests!
 """
 from typing import List, Optional, Tuple
+import io
 import os
+import time
 import pygame
 import pytest
 
-from block import Block
-from blocky import _block_to_squares
-from goal import BlobGoal, PerimeterGoal, _flatten
-from player import _get_block
+from arrayboard import ArrayBoard
+from bitboard import BitboardBlobGoal, BitboardPerimeterGoal, blob_bits, \
+    to_bitboards
+from block import Block, MoveJournal
+from codec import BoardReader, BoardWriter, decode, encode
+from persistent import PersistentBlock, block_path
+from blocky import GameData, MainState, _block_to_squares
+from grid import attach_grid
+from moves import MoveIndex, move_index
+from goal import BlobGoal, PerimeterGoal, _flatten, _flatten_array, \
+    _flatten_indices, board_scores, fused_score
+from player import LookaheadPlayer, MCTSPlayer, SmartPlayer, _get_block, \
+    create_players
 from renderer import Renderer
-from settings import COLOUR_LIST
+from settings import COLOUR_LIST, PALETTE
+from subtrees import SubtreeStore
 
 
 def set_children(block: Block, colours: List[Optional[Tuple[int, int, int]]]) \
@@ -257,6 +269,231 @@ class TestBlock:
         board_16x16.children[0].rotate(1)
         assert board_16x16 == board_16x16_rotate1
 
+    def test_palette_colours(self, board_16x16) -> None:
+        """Test that a block stores its colour as an index into PALETTE while
+        still reporting the colour itself.
+        """
+        leaf = board_16x16.children[1]
+        assert not hasattr(leaf, '__dict__')
+        assert leaf.colour_index == 2
+        assert leaf.colour == COLOUR_LIST[2]
+        leaf.colour = 3
+        assert leaf.colour == COLOUR_LIST[3]
+        leaf.colour = COLOUR_LIST[0]
+        assert leaf.colour_index == 0
+        assert board_16x16.colour is None
+        assert board_16x16.colour_index is None
+
+    def test_position_follows_moves(self, board_16x16) -> None:
+        """Test that a block's position stays correct when one of its
+        ancestors is swapped or rotated.
+        """
+        block = board_16x16.children[0].children[3]
+        assert block.position == (563, 188)
+        board_16x16.swap(0)
+        assert block.position == (188, 188)
+        board_16x16.rotate(1)
+        assert block.position == (375, 188)
+        assert _get_block(board_16x16, block.position, 2) is block
+
+    def test_rotate_root_and_back(self, board_16x16) -> None:
+        """Test that rotating the whole board is undone by rotating it back,
+        and by rotating it four times in the same direction.
+        """
+        original = board_16x16.create_copy()
+        board_16x16.rotate(1)
+        board_16x16.children[0].rotate(1)
+        assert board_16x16 != original
+        board_16x16.children[0].rotate(3)
+        board_16x16.rotate(3)
+        assert board_16x16 == original
+        for _ in range(4):
+            board_16x16.rotate(1)
+        assert board_16x16 == original
+        assert set(_block_to_squares(board_16x16)) == \
+            set(_block_to_squares(original))
+
+    def test_swap_below_pending_rotate(self, board_16x16) -> None:
+        """Test that a block is swapped where it is on the board while a
+        rotate of an ancestor has not been carried out yet.
+        """
+        expected = board_16x16.create_copy()
+        block = board_16x16.children[0]
+        board_16x16.rotate(1)
+        assert block.swap(0)
+        expected.rotate(1)
+        # Rotating clockwise moves the upper-right child to the lower right
+        assert expected.children[3].swap(0)
+        assert board_16x16 == expected
+
+    def test_fingerprint_follows_moves(self, board_16x16) -> None:
+        """Test that the fingerprint kept up to date by the moves is the one
+        a freshly built copy of the board has.
+        """
+        original = board_16x16.fingerprint()
+        board_16x16.rotate(1)
+        board_16x16.children[3].swap(1)
+        board_16x16.children[3].rotate(3)
+        board_16x16.children[1].smash()
+        assert board_16x16.children[3].children[1].paint(COLOUR_LIST[1])
+        rebuilt = ArrayBoard.from_block(board_16x16).to_block()
+        assert board_16x16.fingerprint() == rebuilt.fingerprint()
+        assert board_16x16.fingerprint() != original
+
+        assert board_16x16.children[3].combine()
+        rebuilt = ArrayBoard.from_block(board_16x16).to_block()
+        assert board_16x16.fingerprint() == rebuilt.fingerprint()
+
+    def test_fingerprint_equal_blocks(self, board_16x16) -> None:
+        """Test that equal boards have the same fingerprint and hash, and
+        that the fingerprint does not depend on where a subtree is.
+        """
+        copy = board_16x16.create_copy()
+        assert hash(copy) == hash(board_16x16)
+        assert len({copy, board_16x16}) == 1
+        copy.rotate(1)
+        assert copy.fingerprint() != board_16x16.fingerprint()
+        assert copy != board_16x16
+
+        leaf = board_16x16.children[1]
+        other = Block((0, 0), leaf.size, leaf.colour, leaf.level,
+                      leaf.max_depth)
+        assert other.fingerprint() == leaf.fingerprint()
+
+        # Comparing boards does not work out fingerprints that are not known
+        rebuilt = ArrayBoard.from_block(board_16x16).to_block()
+        assert rebuilt == board_16x16
+        assert rebuilt != copy
+        assert rebuilt._fingerprints is None
+
+    def test_iterators(self, board_16x16) -> None:
+        """Test that the traversal iterators yield the expected blocks in the
+        order of the children.
+        """
+        top_right = board_16x16.children[0]
+        assert list(board_16x16.iter_leaves()) == \
+            top_right.children + board_16x16.children[1:]
+        assert list(board_16x16.iter_level(1)) == board_16x16.children
+        assert list(board_16x16.iter_level(2)) == top_right.children
+        assert list(board_16x16.iter_rect(375, 0, 188, 375)) == \
+            top_right.children[1:3]
+        assert list(board_16x16.iter_rect(0, 0, 1, 1)) == \
+            [board_16x16.children[1]]
+
+    def test_write_to(self, board_16x16) -> None:
+        """Test that write_to writes the same text as str.
+        """
+        file = io.StringIO()
+        board_16x16.write_to(file)
+        assert file.getvalue() == str(board_16x16)
+        assert file.getvalue().count('\n') == 9
+
+    def test_move_checks(self, board_16x16) -> None:
+        """Test that the can_ methods and combine_colour answer whether each
+        move would succeed, without changing the board.
+        """
+        before = str(board_16x16)
+        parent = board_16x16.children[0]
+        leaf = parent.children[1]
+        assert board_16x16.can_rotate() and board_16x16.can_swap()
+        assert not leaf.can_rotate() and not leaf.can_swap()
+        assert board_16x16.children[1].can_smash()
+        assert not parent.can_smash() and not leaf.can_smash()
+        assert leaf.can_paint(COLOUR_LIST[0])
+        assert not leaf.can_paint(COLOUR_LIST[1])
+        assert not board_16x16.children[1].can_paint(COLOUR_LIST[0])
+        assert parent.can_combine() and not board_16x16.can_combine()
+        assert parent.combine_colour() == COLOUR_LIST[1]
+        assert board_16x16.combine_colour() is None
+        assert str(board_16x16) == before
+
+        assert parent.combine()
+        assert parent.colour == COLOUR_LIST[1]
+        assert not parent.can_combine() and not parent.can_rotate()
+
+
+class TestMoveJournal:
+    """A collection of methods for testing the MoveJournal class.
+    """
+    def test_undo_restores_board(self, board_16x16) -> None:
+        """Test that undoing every move restores the original board, keeping
+        the same Block objects.
+        """
+        original = board_16x16.create_copy()
+        children = board_16x16.children[:]
+        journal = MoveJournal()
+        assert journal.apply(board_16x16, ('rotate', 1))
+        assert journal.apply(board_16x16.children[3], ('swap', 0))
+        assert journal.apply(board_16x16.children[1], ('smash', None))
+        assert journal.apply(board_16x16.children[3].children[0],
+                             ('paint', None), COLOUR_LIST[0])
+        assert not journal.apply(board_16x16, ('combine', None))
+        assert len(journal) == 4
+
+        while journal.undo():
+            pass
+        assert board_16x16 == original
+        assert board_16x16.children == children
+        for i in range(4):
+            assert board_16x16.children[i] is children[i]
+
+    def test_undo_combine_and_redo_smash(self, board_16x16) -> None:
+        """Test that combine can be undone and that redo replays the same
+        smash.
+        """
+        original = board_16x16.create_copy()
+        journal = MoveJournal()
+        assert journal.apply(board_16x16.children[0], ('combine', None))
+        assert journal.undo()
+        assert board_16x16 == original
+
+        assert journal.apply(board_16x16.children[1], ('smash', None))
+        smashed = board_16x16.create_copy()
+        assert journal.undo()
+        assert board_16x16 == original
+        assert journal.redo()
+        assert board_16x16 == smashed
+
+    def test_undo_combine_below_pending_rotate(self, board_16x16) -> None:
+        """Test that undoing a combine puts the children back in their places
+        while a rotate of an ancestor has not been carried out yet.
+        """
+        parent = board_16x16.children[0]
+        board_16x16.rotate(1)
+        rotated = board_16x16.create_copy()
+        journal = MoveJournal()
+        assert journal.apply(parent, ('combine', None))
+        assert board_16x16 != rotated
+        assert journal.undo()
+        assert board_16x16 == rotated
+
+
+class TestGameData:
+    """A collection of methods for testing the score cache of GameData.
+    """
+    def test_score_cache(self, board_16x16) -> None:
+        """Test that scores are only worked out again after a move that
+        changes the board.
+        """
+        players = create_players(0, 2, [])
+        data = GameData(board_16x16, players)
+        state = MainState(data)
+        assert (data.score_hits, data.score_misses) == (0, 1)
+        scores = [data.calculate_score(player.id) for player in players]
+        assert (data.score_hits, data.score_misses) == (1, 2)
+
+        assert state._do_move(('pass', None, board_16x16))
+        assert data.board_version == 0
+        assert [data.calculate_score(player.id) for player in players] == \
+            scores
+        assert data.score_misses == 2
+
+        assert state._do_move(('rotate', 1, board_16x16.children[0]))
+        assert data.board_version == 1
+        assert data.score_misses == 3
+        assert data.calculate_score(players[1].id)[0] == \
+            players[1].goal.score(board_16x16)
+
 
 class TestPlayer:
     """A collection of methods for testing the methods and functions in the
@@ -283,6 +520,70 @@ class TestPlayer:
         assert _get_block(board_16x16, top_right, 2) == \
             board_16x16.children[0].children[0]
 
+    def test_exhaustive_smart_player(self, board_16x16) -> None:
+        """Test that an exhaustive SmartPlayer picks a move that no other legal
+        move beats, that it picks the same one every time, and that it leaves
+        the board as it was.
+        """
+        before = str(board_16x16)
+        for goal in [BlobGoal(COLOUR_LIST[3]), PerimeterGoal(COLOUR_LIST[1])]:
+            player = SmartPlayer(0, goal, 1, exhaustive=True)
+            chosen = []
+            for _ in range(2):
+                player._proceed = True
+                chosen.append(player.generate_move(board_16x16))
+            assert chosen[0] == chosen[1]
+            assert chosen[0][0] != 'pass'
+            best = goal.score_delta(board_16x16, chosen[0])
+            for move in move_index(board_16x16).legal_moves(goal.colour):
+                if move[0] != 'smash':
+                    assert goal.score_delta(board_16x16, move) <= best
+            assert str(board_16x16) == before
+
+    def test_mcts_player(self) -> None:
+        """Test that an MCTSPlayer keeps to its time budget, leaves the board
+        as it was, and finds the only move that raises its score net of
+        penalties.
+        """
+        # Every cell of a board of depth 1 is a corner, so only painting a
+        # cell of another colour scores, and it gains 2 points for 1 penalty
+        board = Block((0, 0), 750, None, 0, 1)
+        set_children(board, [COLOUR_LIST[0], COLOUR_LIST[1], COLOUR_LIST[1],
+                             COLOUR_LIST[1]])
+        before = str(board)
+        player = MCTSPlayer(0, PerimeterGoal(COLOUR_LIST[0]), budget=0.2)
+        player._proceed = True
+        start = time.perf_counter()
+        move = player.generate_move(board)
+        assert time.perf_counter() - start < 1
+        assert move[0] == 'paint'
+        assert move[2] in board.children
+        assert str(board) == before
+
+    def test_lookahead_player(self) -> None:
+        """Test that a LookaheadPlayer leaves the board as it was, keeps its
+        transposition table within its size, and paints a cell even though
+        the other player can paint one back.
+        """
+        board = Block((0, 0), 750, None, 0, 1)
+        set_children(board, [COLOUR_LIST[0], COLOUR_LIST[1], COLOUR_LIST[1],
+                             COLOUR_LIST[1]])
+        before = str(board)
+        goals = [PerimeterGoal(COLOUR_LIST[0]), PerimeterGoal(COLOUR_LIST[1])]
+        player = LookaheadPlayer(0, goals, plies=3, table_size=5)
+        player._proceed = True
+        move = player.generate_move(board)
+        assert move[0] == 'paint'
+        assert move[2] in board.children
+        assert str(board) == before
+        assert 0 < len(player._table) <= 5
+
+        players = create_players(0, 1, [], [2], [0.1])
+        assert isinstance(players[1], LookaheadPlayer)
+        assert players[1]._goals == [player.goal for player in players]
+        assert isinstance(players[2], MCTSPlayer)
+        assert players[2]._budget == 0.1
+
 
 class TestGoal:
     """A collection of methods for testing the sub-classes of Goal.
@@ -328,6 +629,358 @@ class TestGoal:
             goal = PerimeterGoal(colour)
             assert goal.score(board_16x16) == expected
 
+    def test_array_and_list_scores(self, board_16x16, child_block) -> None:
+        """Test that a board flattened into a NumPy array has the same cells as
+        when it is flattened into lists, and that the goals score the lists
+        the same way as the board.
+        """
+        pytest.importorskip('numpy')
+        for board in [board_16x16, child_block]:
+            flat = _flatten_indices(board)
+            assert _flatten_array(board).tolist() == flat
+            for colour in COLOUR_LIST:
+                for goal in [BlobGoal(colour), PerimeterGoal(colour)]:
+                    assert goal._score_indices(flat) == goal.score(board)
+
+    def test_perimeter_edge_weights(self) -> None:
+        """Test that the perimeter scored from the table of edge cells counts
+        each edge cell once and each corner twice, on boards of one colour.
+        """
+        for max_depth, expected in [(0, 2), (1, 8), (3, 32)]:
+            board = Block((0, 0), 750, COLOUR_LIST[0], 0, max_depth)
+            goal = PerimeterGoal(COLOUR_LIST[0])
+            assert goal._score_indices(_flatten_indices(board)) == expected
+            assert PerimeterGoal(COLOUR_LIST[1])._score_indices(
+                _flatten_indices(board)) == 0
+
+    def test_blob_covering_deep_board(self) -> None:
+        """Test that a blob covering a whole deep board is scored without
+        reaching the recursion limit.
+        """
+        board = Block((0, 0), 750, COLOUR_LIST[0], 0, 8)
+        goal = BlobGoal(COLOUR_LIST[0])
+        assert goal.score(board) == 4 ** 8
+        assert goal._score_indices(_flatten_indices(board)) == 4 ** 8
+        visited = [[-1] * 2 ** 8 for _ in range(2 ** 8)]
+        assert goal._undiscovered_blob_size((0, 0), _flatten_indices(board),
+                                            visited) == 4 ** 8
+        assert BlobGoal(COLOUR_LIST[1]).score(board) == 0
+
+    def test_blob_without_flattening(self, board_16x16) -> None:
+        """Test that the blob scored from the undivided blocks is the same as
+        the one scored from the flattened board.
+        """
+        assert board_16x16.children[1].smash()
+        for board in [board_16x16, PersistentBlock.from_block(board_16x16)]:
+            flat = _flatten_indices(board)
+            for colour in COLOUR_LIST:
+                goal = BlobGoal(colour)
+                assert goal.score(board) == goal._score_indices(flat)
+
+    def test_board_scores(self, board_16x16) -> None:
+        """Test that scoring every goal in one pass gives the same scores as
+        the goals, and that the scores are reused until the board changes.
+        """
+        scores = board_scores(board_16x16)
+        assert board_scores(board_16x16) is scores
+        for colour in COLOUR_LIST:
+            for goal in [BlobGoal(colour), PerimeterGoal(colour)]:
+                assert fused_score(board_16x16, goal) == \
+                    goal.score(board_16x16)
+        board_16x16.children[0].rotate(1)
+        assert board_scores(board_16x16) is not scores
+        assert board_scores(board_16x16)[PerimeterGoal] != \
+            scores[PerimeterGoal]
+
+    def test_perimeter_without_flattening(self, board_16x16,
+                                          child_block) -> None:
+        """Test that the perimeter scored from the blocks on the sides of the
+        board is the same as the one scored from the flattened board, for
+        Blocks and PersistentBlocks.
+        """
+        for board in [board_16x16, child_block,
+                      PersistentBlock.from_block(board_16x16)]:
+            flat = _flatten_indices(board)
+            for colour in COLOUR_LIST:
+                goal = PerimeterGoal(colour)
+                assert goal.score(board) == goal._score_indices(flat)
+
+    def test_score_delta(self, board_16x16) -> None:
+        """Test that the score change of a move is the score of a copy of the
+        board with the move made on it minus the score of the board, and that
+        the board itself is left as it was.
+        """
+        before = str(board_16x16)
+        moves = [([], ('rotate', 1)), ([0], ('rotate', 3)),
+                 ([], ('swap', 0)), ([0], ('swap', 1)),
+                 ([0], ('combine', None)), ([0, 1], ('paint', None)),
+                 ([1], ('rotate', 1))]
+        for colour in COLOUR_LIST:
+            for goal in [BlobGoal(colour), PerimeterGoal(colour)]:
+                for path, action in moves:
+                    copy = board_16x16.create_copy()
+                    block, target = board_16x16, copy
+                    for i in path:
+                        block, target = block.children[i], target.children[i]
+                    MoveJournal().apply(target, action, colour)
+                    expected = goal.score(copy) - goal.score(board_16x16)
+                    move = (action[0], action[1], block)
+                    assert goal.score_delta(board_16x16, move) == expected
+                    assert str(board_16x16) == before
+
+
+class TestBoardGrid:
+    """A collection of methods for testing the BoardGrid class.
+    """
+    def test_moves_patch_grid(self, board_16x16) -> None:
+        """Test that the grid attached to a board follows every kind of move,
+        including undoing them, and that the goals score it correctly.
+        """
+        pytest.importorskip('numpy')
+        grid = attach_grid(board_16x16)
+        journal = MoveJournal()
+        # Each move is given as the path of child indices to its block
+        moves = [([], ('rotate', 1)), ([3], ('swap', 1)),
+                 ([3], ('rotate', 3)), ([1], ('smash', None)),
+                 ([3, 1], ('paint', None)), ([3], ('combine', None))]
+        for path, action in moves:
+            block = board_16x16
+            for index in path:
+                block = block.children[index]
+            assert journal.apply(block, action, COLOUR_LIST[1])
+            assert grid.cells.tolist() == _flatten_indices(board_16x16)
+            for colour in COLOUR_LIST:
+                goal = PerimeterGoal(colour)
+                assert goal.score(board_16x16) == \
+                    goal._score_indices(_flatten_indices(board_16x16))
+        while journal.undo():
+            assert grid.cells.tolist() == _flatten_indices(board_16x16)
+
+        grid.detach()
+        board_16x16.rotate(1)
+        assert grid.cells.tolist() != _flatten_indices(board_16x16)
+
+    def test_paint_below_pending_rotate(self, board_16x16) -> None:
+        """Test that painting a leaf patches the right cells while a rotate of
+        one of its ancestors has not been carried out yet.
+        """
+        pytest.importorskip('numpy')
+        grid = attach_grid(board_16x16)
+        leaf = board_16x16.children[0].children[1]
+        board_16x16.rotate(1)
+        assert leaf.paint(COLOUR_LIST[2])
+        assert grid.cells.tolist() == _flatten_indices(board_16x16)
+
+
+class TestMoveIndex:
+    """A collection of methods for testing the MoveIndex class.
+    """
+    def test_legal_moves(self, board_16x16) -> None:
+        """Test that the reference board has the expected legal moves, and
+        that random_move draws one of them.
+        """
+        moves = move_index(board_16x16)
+        legal = list(moves.legal_moves(COLOUR_LIST[1]))
+        # 2 subdivided blocks with 4 moves each, 3 leaves to smash, 1 block
+        # to combine and 2 leaves at max_depth not of COLOUR_LIST[1]
+        assert len(legal) == moves.count(COLOUR_LIST[1]) == 14
+        assert [move[0] for move in legal].count('paint') == 2
+        assert move_index(board_16x16) is moves
+        for _ in range(20):
+            assert moves.random_move(COLOUR_LIST[1]) in legal
+
+    def test_index_follows_moves(self, board_16x16) -> None:
+        """Test that the index attached to a board lists the same moves as a
+        new index of a copy of the board, while moves are made and undone.
+        """
+        moves = move_index(board_16x16)
+        journal = MoveJournal()
+        for _ in range(30):
+            move = moves.random_move(COLOUR_LIST[0])
+            assert journal.apply(move[2], move[:2], COLOUR_LIST[0])
+            if len(journal) % 3 == 0:
+                journal.undo()
+            new = MoveIndex(board_16x16.create_copy())
+            for colour in COLOUR_LIST:
+                kept = [(name, direction, block.level, block.position)
+                        for name, direction, block in moves.legal_moves(colour)]
+                fresh = [(name, direction, block.level, block.position)
+                         for name, direction, block in new.legal_moves(colour)]
+                assert sorted(kept, key=str) == sorted(fresh, key=str)
+
+
+class TestArrayBoard:
+    """A collection of methods for testing the ArrayBoard class against the
+    Block class.
+    """
+    def test_round_trip(self, board_16x16) -> None:
+        """Test that converting the reference board to an ArrayBoard and back
+        gives the same board.
+        """
+        assert ArrayBoard.from_block(board_16x16).to_block() == board_16x16
+
+    def test_swap0(self, board_16x16, board_16x16_swap0) -> None:
+        """Test that swapping the root of an ArrayBoard matches Block.swap.
+        """
+        board = ArrayBoard.from_block(board_16x16)
+        assert board.swap(0, 0)
+        assert board == ArrayBoard.from_block(board_16x16_swap0)
+
+    def test_rotate1(self, board_16x16, board_16x16_rotate1) -> None:
+        """Test that rotating node 1 (the top-right block on level 1)
+        matches Block.rotate.
+        """
+        board = ArrayBoard.from_block(board_16x16)
+        assert board.rotate(1, 1)
+        assert board == ArrayBoard.from_block(board_16x16_rotate1)
+
+    def test_combine_and_paint(self, board_16x16) -> None:
+        """Test that combine and paint follow the same rules as Block.
+        """
+        board = ArrayBoard.from_block(board_16x16)
+        copy = board.create_copy()
+        assert board.combine(1)
+        assert board.colour(1) == COLOUR_LIST[1]
+        assert copy.colour(1) is None
+        assert not copy.paint(5, COLOUR_LIST[0])
+        assert copy.paint(5, COLOUR_LIST[2])
+        assert copy.colour(5) == COLOUR_LIST[2]
+
+
+class TestPersistentBlock:
+    """A collection of methods for testing the PersistentBlock class.
+    """
+    def test_swap0(self, board_16x16, board_16x16_swap0) -> None:
+        """Test that a swap returns a new board and leaves the old one alone.
+        """
+        board = PersistentBlock.from_block(board_16x16)
+        swapped = board.swap([], 0)
+        assert swapped.to_block() == board_16x16_swap0
+        assert board.to_block() == board_16x16
+
+    def test_rotate_shares_untouched_blocks(self, board_16x16,
+                                            board_16x16_rotate1) -> None:
+        """Test that rotating one block only copies the path to that block.
+        """
+        board = PersistentBlock.from_block(board_16x16)
+        path = block_path(board_16x16, board_16x16.children[0])
+        assert path == [0]
+        rotated = board.rotate(path, 1)
+        assert rotated.to_block() == board_16x16_rotate1
+        for i in range(1, 4):
+            assert rotated.children[i] is board.children[i]
+        # The rotated block itself shares its children with the original
+        assert rotated.children[0]._children is board.children[0].children
+        expected = board_16x16.create_copy()
+        expected.rotate(3)
+        assert board.rotate([], 3).to_block() == expected
+
+    def test_invalid_moves(self, board_16x16) -> None:
+        """Test that invalid moves return None.
+        """
+        board = PersistentBlock.from_block(board_16x16)
+        assert board.rotate([1], 1) is None
+        assert board.smash([0, 0]) is None
+        assert board.paint([0, 0], COLOUR_LIST[0]) is None
+        assert board.combine([]) is None
+
+
+class TestSubtreeStore:
+    """A collection of methods for testing the SubtreeStore class.
+    """
+    def test_equal_subtrees_share_ids(self, board_16x16,
+                                      board_16x16_swap0) -> None:
+        """Test that equal subtrees get the same id, wherever they are, and
+        that different boards get different ids.
+        """
+        store = SubtreeStore(2)
+        board = store.intern(board_16x16)
+        swapped = store.intern(board_16x16_swap0)
+        assert board != swapped
+        assert store.intern(board_16x16.create_copy()) == board
+        assert store.children(board)[0] == store.children(swapped)[1]
+        # The two red blocks at level 2 are stored once
+        assert store.children(store.children(board)[0])[1] == \
+            store.children(store.children(board)[0])[2]
+        assert store.to_block(board, 750) == board_16x16
+
+    def test_flatten_and_score(self, board_16x16,
+                               flattened_board_16x16) -> None:
+        """Test that the store flattens and scores boards like goal.py.
+        """
+        store = SubtreeStore(2)
+        board = store.intern(board_16x16)
+        assert [[PALETTE[cell] for cell in column]
+                for column in store.flatten(board)] == flattened_board_16x16
+        for goal in [BlobGoal(COLOUR_LIST[1]), PerimeterGoal(COLOUR_LIST[3])]:
+            assert store.score(board, goal) == goal.score(board_16x16)
+
+
+class TestCodec:
+    """A collection of methods for testing the functions and classes in
+    codec.py.
+    """
+    def test_encode_and_decode(self, board_16x16, child_block) -> None:
+        """Test that decoding an encoded board gives the same board.
+        """
+        data = encode(board_16x16)
+        # 4 header bytes, 5 split bits and 7 leaves of 2 bits each
+        assert len(data) == 4 + 3
+        assert decode(data) == board_16x16
+        assert decode(encode(child_block)) == child_block
+
+    def test_reader_and_writer(self, board_16x16, board_16x16_swap0,
+                               board_16x16_rotate1) -> None:
+        """Test that a BoardReader reads back the boards written by a
+        BoardWriter, in the same order.
+        """
+        boards = [board_16x16, board_16x16_swap0, board_16x16_rotate1]
+        file = io.BytesIO()
+        writer = BoardWriter(file)
+        for board in boards:
+            writer.write(board)
+        assert writer.count == 3
+        file.seek(0)
+        assert list(BoardReader(file)) == boards
+
+
+class TestBitboard:
+    """A collection of methods for testing the functions and goals in
+    bitboard.py.
+    """
+    def test_to_bitboards(self, board_16x16) -> None:
+        """Test that every unit cell is in the bitboard of its colour and in
+        no other.
+        """
+        bitboards = to_bitboards(board_16x16)
+        flat = _flatten_indices(board_16x16)
+        for i in range(4):
+            for j in range(4):
+                for colour in range(len(bitboards)):
+                    assert (bitboards[colour] >> j * 4 + i & 1) == \
+                        (flat[i][j] == colour)
+
+    def test_bitboard_goals(self, board_16x16, child_block) -> None:
+        """Test that the bitboard goals give the same scores as the goals
+        they replace.
+        """
+        for board in [board_16x16, child_block,
+                      Block((0, 0), 750, COLOUR_LIST[2], 0, 0),
+                      PersistentBlock.from_block(board_16x16)]:
+            for colour in COLOUR_LIST:
+                assert BitboardPerimeterGoal(colour).score(board) == \
+                    PerimeterGoal(colour).score(board)
+                assert BitboardBlobGoal(colour).score(board) == \
+                    BlobGoal(colour).score(board)
+
+    def test_blob_does_not_wrap(self) -> None:
+        """Test that a blob is not joined across the left and right edges of
+        the board, which are next to each other in the bitboard.
+        """
+        # The last cell of the first row and the first cell of the second
+        assert blob_bits(0b11000, 4) == 1
+        assert blob_bits(0b1100, 4) == 2
+
 
 if __name__ == '__main__':
     pytest.main(['example_tests.py'])
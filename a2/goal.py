@@ -20,12 +20,21 @@ Misha Schwartz, and Jaisie Sin
 === Module Description ===
 
 This file contains the hierarchy of Goal classes.
+
+If NumPy is installed, _flatten_array flattens a board into a NumPy array of
+colour indices.
 """
 from __future__ import annotations
 import random
-from typing import List, Tuple
-from block import Block
-from settings import colour_name, COLOUR_LIST
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, \
+    Tuple
+from block import Block, MoveJournal
+from settings import colour_name, colour_index, COLOUR_LIST, PALETTE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def generate_goals(num_goals: int) -> List[Goal]:
@@ -68,35 +77,76 @@ def _flatten(block: Block) -> List[List[Tuple[int, int, int]]]:
 
     L[0][0] represents the unit cell in the upper left corner of the Block.
     """
-    lst = []
-    if len(block.children) != 4:  # don't have to recurse here
-        for _ in range(2 ** (block.max_depth - block.level)):
-            # this for loop creates a 2D list where the length of the list is
-            # the same as the length of all the lists inside. The creates a
-            # square 2D list where all the values are the same colour
-
-            # this looks complicated but the amount of iterations is 2 to the
-            # power of the difference between max_depth and level. For example,
-            # if max_depth is 4 and the block is on level 1 then this iterates
-            # 8 times
-            lst.append([block.colour]*(2 ** (block.max_depth - block.level)))
-            # this appends a list of the same colour where the list is the same
-            # length as the amount of time the loop iterates
-    else:  # recursing!
-        child0 = _flatten(block.children[0])
-        child1 = _flatten(block.children[1])
-        child2 = _flatten(block.children[2])
-        child3 = _flatten(block.children[3])
-
-        # adds to the list from left to right
-        for i in range(len(child0)):  # adding the left half of the blocks
-            lst.append(child1[i] + child2[i])
-        for i in range(len(child0)):  # adding the right half of the blocks
-            lst.append(child0[i] + child3[i])
+    return [[PALETTE[cell] for cell in column]
+            for column in _flatten_indices(block)]
+
 
+def _leaf_regions(block: Block, region: Optional[Tuple[int, int, int]] = None,
+                  side: int = 0) -> Iterator[Tuple[Block, int, int, int]]:
+    """Yield every undivided block in <block>, with the column and row of its
+    upper left unit cell and its width in unit cells.
+
+    <region> is the column and row of the upper left unit cell of <block>
+    and its width in unit cells. It is (0, 0, the width of <block>) if it is
+    not given. If <side> is not 0, only the blocks that touch an edge of a
+    board <side> unit cells wide are visited.
+    """
+    if region is None:
+        region = (0, 0, 2 ** (block.max_depth - block.level))
+    # The stack holds the blocks left to visit, with the column and row of
+    # their upper left unit cell and their width in unit cells
+    stack = [(block,) + region]
+    while stack:
+        current, column, row, cells = stack.pop()
+        children = current.children
+        if len(children) == 4:
+            half = cells // 2
+            for child, child_column, child_row in \
+                    [(children[0], column + half, row),
+                     (children[1], column, row),
+                     (children[2], column, row + half),
+                     (children[3], column + half, row + half)]:
+                if side == 0 or child_column == 0 or child_row == 0 or \
+                        child_column + half == side or \
+                        child_row + half == side:
+                    stack.append((child, child_column, child_row, half))
+        else:
+            yield current, column, row, cells
+
+
+def _flatten_indices(block: Block) -> List[List[int]]:
+    """Return <block> as a two-dimensional list of unit cells, like _flatten,
+    except that each unit cell is the index of its colour in PALETTE.
+
+    The goals score this version, since comparing small ints is cheaper than
+    comparing tuples.
+    """
+    side = 2 ** (block.max_depth - block.level)
+    lst = [[0] * side for _ in range(side)]
+    # Each undivided block is written straight into lst
+    for current, column, row, cells in _leaf_regions(block):
+        colours = [current.colour_index] * cells
+        for i in range(column, column + cells):
+            lst[i][row:row + cells] = colours
     return lst
 
 
+def _flatten_array(block: Block) -> Any:
+    """Return <block> as a two-dimensional NumPy array of unit cells, in the
+    same layout as _flatten_indices: element [i, j] is the index in PALETTE
+    of the colour of the unit cell at column i and row j.
+
+    Each undivided block is filled in with one slice assignment.
+
+    Precondition: NumPy is installed.
+    """
+    side = 2 ** (block.max_depth - block.level)
+    grid = numpy.empty((side, side), dtype=numpy.uint8)
+    for current, column, row, cells in _leaf_regions(block):
+        grid[column:column + cells, row:row + cells] = current.colour_index
+    return grid
+
+
 class Goal:
     """A player goal in the game of Blocky.
 
@@ -106,21 +156,66 @@ class Goal:
     colour:
         The target colour for this goal, that is the colour to which
         this goal applies.
+    colour_index:
+        The index of <colour> in PALETTE, which is what scoring compares
+        against the colours of the blocks.
     """
-    colour: Tuple[int, int, int]
+    colour_index: int
 
     def __init__(self, target_colour: Tuple[int, int, int]) -> None:
         """Initialize this goal to have the given target colour.
         """
         self.colour = target_colour
 
+    @property
+    def colour(self) -> Tuple[int, int, int]:
+        """The target colour for this goal.
+        """
+        return PALETTE[self.colour_index]
+
+    @colour.setter
+    def colour(self, colour: Tuple[int, int, int]) -> None:
+        self.colour_index = colour_index(colour)
+
     def score(self, board: Block) -> int:
         """Return the current score for this goal on the given board.
 
         The score is always greater than or equal to 0.
         """
+        grid = getattr(board, '_grid', None)
+        if grid is not None:
+            return self._score_grid(grid)
+        return self._score_block(board)
+
+    def score_delta(self, board: Block,
+                    move: Tuple[str, Optional[int], Block]) -> int:
+        """Return how much the score for this goal on <board> would change if
+        <move> were made, leaving <board> as it is.
+
+        <move> is a tuple of an action name, a direction and a block in
+        <board>, in the form returned by Player.generate_move. A paint uses
+        this goal's colour. A move that cannot be made changes nothing.
+        """
+        return _journal_delta(self, board, move)
+
+    def _score_block(self, board: Block) -> int:
+        """Return the score for this goal on <board>, which has no grid
+        attached to it.
+        """
+        return self._score_indices(_flatten_indices(board))
+
+    def _score_indices(self, flat: List[List[int]]) -> int:
+        """Return the score for this goal on the board flattened into <flat>
+        by _flatten_indices.
+        """
         raise NotImplementedError
 
+    def _score_grid(self, grid: Any) -> int:
+        """Return the score for this goal on the board that the grid.BoardGrid
+        <grid> is attached to.
+        """
+        return self._score_indices(grid.cells.tolist())
+
     def description(self) -> str:
         """Return a description of this goal.
         """
@@ -144,6 +239,131 @@ def _add_points(i_pos: int, j_pos: int, size: int) -> int:
     return points
 
 
+# _EDGE_WEIGHTS[side] is the (column, row, points) of every unit cell on an
+# edge of a board <side> unit cells wide, with the points given by
+# _add_points. PerimeterGoal._score_indices reads it. It only depends on the
+# width of the board, so it is worked out the first time a board of that
+# width is scored, and kept.
+_EDGE_WEIGHTS: Dict[int, List[Tuple[int, int, int]]] = {}
+
+
+def _edge_weights(side: int) -> List[Tuple[int, int, int]]:
+    """Return the (column, row, points) of every unit cell on an edge of a
+    board <side> unit cells wide, where points is what a cell of the target
+    colour there scores for a PerimeterGoal.
+    """
+    if side not in _EDGE_WEIGHTS:
+        last = side - 1
+        if side == 1:
+            cells = [(0, 0)]
+        else:
+            # The top and bottom rows, then the rest of the two side columns
+            cells = [(i, j) for i in range(side) for j in (0, last)] + \
+                [(i, j) for i in (0, last) for j in range(1, last)]
+        _EDGE_WEIGHTS[side] = [(i, j, _add_points(i, j, side))
+                               for i, j in cells]
+    return _EDGE_WEIGHTS[side]
+
+
+def _block_region(board: Block, block: Block) \
+        -> Optional[Tuple[int, int, int]]:
+    """Return the column and row of the upper left unit cell of <block> in
+    <board> and its width in unit cells, or None if <block> is not in
+    <board>.
+    """
+    # A transform still pending on an ancestor would make the children of
+    # the blocks below it out of date, so carry them all out first
+    block._settle()
+    path = []
+    while block is not board:
+        parent = block._parent
+        if parent is None:
+            return None
+        siblings = parent.children
+        for index in range(len(siblings)):
+            if siblings[index] is block:
+                path.append(index)
+                break
+        else:
+            return None
+        block = parent
+
+    column, row, cells = 0, 0, 2 ** (board.max_depth - board.level)
+    for index in reversed(path):
+        cells //= 2
+        if index in (0, 3):
+            column += cells
+        if index in (2, 3):
+            row += cells
+    return column, row, cells
+
+
+def _perimeter_points(board: Block, colour: int) -> int:
+    """Return the score of a PerimeterGoal for the colour at index <colour> in
+    PALETTE on <board>, visiting only the blocks that touch an edge of the
+    board.
+
+    A unit cell scores 1 point for each edge of the board it is on, so a
+    corner scores 2. An undivided block that touches an edge therefore scores
+    its width in unit cells for each edge it touches. On a board made of one
+    unit cell, that cell scores 2.
+    """
+    side = 2 ** (board.max_depth - board.level)
+    if side == 1:
+        return 2 if board.colour_index == colour else 0
+    return _edge_points(board, colour, (0, 0, side), side)
+
+
+def _edge_points(block: Block, colour: int, region: Tuple[int, int, int],
+                 side: int) -> int:
+    """Return the points that the unit cells of <block> of the colour at
+    index <colour> in PALETTE score for being on the edges of a board <side>
+    unit cells wide, where <region> is the column and row of the upper left
+    unit cell of <block> and its width in unit cells.
+
+    Only the blocks that touch an edge are visited. A block in a board of one
+    unit cell scores 4, one for each edge.
+    """
+    points = 0
+    for leaf, column, row, cells in _leaf_regions(block, region, side):
+        if leaf.colour_index == colour:
+            edges = (column == 0) + (row == 0) + (column + cells == side) + \
+                (row + cells == side)
+            points += edges * cells
+    return points
+
+
+def _journal_delta(goal: Goal, board: Block,
+                   move: Tuple[str, Optional[int], Block]) -> int:
+    """Return how much <move> would change the score of <goal> on <board>, by
+    doing the move, scoring the board and undoing the move again.
+
+    The score before the move is looked up with fused_score, so ranking many
+    moves on the same board only scores it once.
+    """
+    before = fused_score(board, goal)
+    journal = MoveJournal()
+    if not journal.apply(move[2], move[:2], goal.colour):
+        return 0
+    after = goal.score(board)
+    journal.undo()
+    return after - before
+
+
+def _has_colour(block: Block, colour: int) -> Tuple[bool, bool]:
+    """Return whether any, and whether all, of the unit cells of <block> are
+    of the colour at index <colour> in PALETTE.
+    """
+    some = False
+    every = True
+    for leaf in block.iter_leaves():
+        if leaf.colour_index == colour:
+            some = True
+        else:
+            every = False
+    return some, every
+
+
 class PerimeterGoal(Goal):
     """Child class of Goal. This goal awards the most points to the user who
     has the most blocks of their colour on the perimeter of the board. Corner
@@ -154,20 +374,54 @@ class PerimeterGoal(Goal):
         The target colour for this goal, that is the colour to which
         this goal applies.
     """
-    def score(self, board: Block) -> int:
-        """returns a point total given a block where 2 points is given for a
-        block on the corner of the board and 1 point is given for every edge
-        piece
+    def _score_indices(self, flat_board: List[List[int]]) -> int:
+        """returns a point total given a flattened board where 2 points is
+        given for a block on the corner of the board and 1 point is given for
+        every edge piece
         """
-        points = 0
-        flat_board = _flatten(board)
-        size = len(flat_board)
-        for i in range(size):
-            for j in range(size):  # iterates through every element
-                col = flat_board[i][j]
-                if col == self.colour:  # color of the block is the target color
-                    points += _add_points(i, j, size)
-        return points
+        colour = self.colour_index
+        # only the cells on the edges can score, and their points are looked
+        # up instead of being worked out again
+        return sum(points for i, j, points in _edge_weights(len(flat_board))
+                   if flat_board[i][j] == colour)
+
+    def _score_grid(self, grid: Any) -> int:
+        """returns the point total of the cells on the edges of <grid>, which
+        are patched by every move instead of flattening the board again
+        """
+        return grid.perimeter(self.colour_index)
+
+    def _score_block(self, board: Block) -> int:
+        """returns the point total for <board> without flattening it, by only
+        looking at the blocks on the sides of the board
+        """
+        return _perimeter_points(board, self.colour_index)
+
+    def score_delta(self, board: Block,
+                    move: Tuple[str, Optional[int], Block]) -> int:
+        """returns how much <move> would change the point total, by only
+        looking at the blocks of the moved block that are on the sides of the
+        board. A move inside the board that does not touch a side changes
+        nothing.
+        """
+        block = move[2]
+        region = _block_region(board, block)
+        if region is None:
+            return 0
+        side = 2 ** (board.max_depth - board.level)
+        column, row, cells = region
+        if column != 0 and row != 0 and column + cells != side and \
+                row + cells != side:
+            return 0
+        before = _edge_points(block, self.colour_index, region, side)
+        journal = MoveJournal()
+        if not journal.apply(block, move[:2], self.colour):
+            return 0
+        after = _edge_points(block, self.colour_index, region, side)
+        journal.undo()
+        if side == 1:  # the only cell scores 2, not 4
+            return (after - before) // 2
+        return after - before
 
     def description(self) -> str:
         """this tells the user what there goal is
@@ -184,6 +438,155 @@ def _help_blob_score(current: int, new: int) -> int:
     return current
 
 
+def _column_runs(column: List[int], colour: int) -> List[Tuple[int, int]]:
+    """Return the runs of unit cells of the colour at index <colour> in
+    PALETTE in <column>, as (first row, row after the last) pairs from top to
+    bottom.
+    """
+    runs = []
+    start = -1
+    for row in range(len(column)):
+        if column[row] == colour:
+            if start == -1:
+                start = row
+        elif start != -1:
+            runs.append((start, row))
+            start = -1
+    if start != -1:
+        runs.append((start, len(column)))
+    return runs
+
+
+def _find(parent: List[int], item: int) -> int:
+    """Return the item that represents the set of <item> in the union-find
+    forest <parent>, halving the path to it on the way.
+    """
+    while parent[item] != item:
+        parent[item] = parent[parent[item]]
+        item = parent[item]
+    return item
+
+
+def _join_overlapping(first: List[Tuple[int, int, int]],
+                      second: List[Tuple[int, int, int]],
+                      parent: List[int], sizes: List[int]) -> int:
+    """Join the set of every (start, end, item) in <first> with the set of
+    every item in <second> whose range [start, end) overlaps it, and return
+    the size of the largest set made.
+
+    <parent> and <sizes> are a union-find forest: sizes[r] is the size of the
+    set of r when parent[r] == r. <first> and <second> must each be sorted and
+    hold ranges that do not overlap each other, so the overlapping ranges
+    are found by walking down both lists together.
+    """
+    best_score = 0
+    i = j = 0
+    while i < len(first) and j < len(second):
+        start, end, item = first[i]
+        next_start, next_end, next_item = second[j]
+        if start < next_end and next_start < end:
+            root, next_root = _find(parent, item), _find(parent, next_item)
+            if root != next_root:
+                if sizes[root] < sizes[next_root]:
+                    root, next_root = next_root, root
+                parent[next_root] = root
+                sizes[root] += sizes[next_root]
+                best_score = _help_blob_score(best_score, sizes[root])
+        if end <= next_end:
+            i += 1
+        else:
+            j += 1
+    return best_score
+
+
+def _largest_blob(runs: List[List[Tuple[int, int]]]) -> int:
+    """Return the number of unit cells in the largest blob made of <runs>,
+    where runs[i] is the list of runs in column i returned by _column_runs.
+
+    Two runs are in the same blob if they are in neighbouring columns and
+    share at least one row. The runs are joined with a union-find, so this
+    takes time proportional to the number of runs and never recurses.
+    """
+    parent = []
+    sizes = []
+    best_score = 0
+    previous = []
+    for column in runs:
+        current = []
+        for start, end in column:
+            current.append((start, end, len(parent)))
+            parent.append(len(parent))
+            sizes.append(end - start)
+            best_score = _help_blob_score(best_score, end - start)
+        best_score = _help_blob_score(
+            best_score, _join_overlapping(previous, current, parent, sizes))
+        previous = current
+    return best_score
+
+
+def _largest_blobs(leaves: Iterable[Tuple[Block, int, int, int]],
+                   group: Callable[[Block], Optional[int]]) -> Dict[int, int]:
+    """Return the number of unit cells in the largest blob of each group of
+    <leaves>, which are undivided blocks in the form yielded by
+    _leaf_regions.
+
+    group(block) is the group of block, or None if block is in no blob. Two
+    blocks of the same group are in the same blob if they touch. Every block
+    in a group is one item in a union-find, weighted by the number of unit
+    cells it covers. Two blocks touch if one ends on the line where the other
+    starts and they overlap along that line, so the blocks are grouped by the
+    lines their sides are on and each line is walked once. The time taken
+    depends on the number of blocks, not on the number of unit cells.
+    """
+    parent = []
+    sizes = []
+    best_scores = {}
+    # For each group and line between two columns of unit cells, the (first
+    # row, row after the last, item) of the blocks that end just before the
+    # line and of those that start just after it. The same for rows.
+    before_column = {}
+    after_column = {}
+    before_row = {}
+    after_row = {}
+    for block, column, row, cells in leaves:
+        key = group(block)
+        if key is not None:
+            item = len(parent)
+            parent.append(item)
+            sizes.append(cells * cells)
+            best_scores[key] = _help_blob_score(best_scores.get(key, 0),
+                                                cells * cells)
+            before_column.setdefault((key, column + cells), []).append(
+                (row, row + cells, item))
+            after_column.setdefault((key, column), []).append(
+                (row, row + cells, item))
+            before_row.setdefault((key, row + cells), []).append(
+                (column, column + cells, item))
+            after_row.setdefault((key, row), []).append(
+                (column, column + cells, item))
+
+    for before, after in [(before_column, after_column),
+                          (before_row, after_row)]:
+        for line in before:
+            if line in after:
+                best_scores[line[0]] = _help_blob_score(
+                    best_scores[line[0]], _join_overlapping(
+                        sorted(before[line]), sorted(after[line]), parent,
+                        sizes))
+    return best_scores
+
+
+def _blob_points(board: Block, colour: int) -> int:
+    """Return the score of a BlobGoal for the colour at index <colour> in
+    PALETTE on <board>, working on its undivided blocks instead of its unit
+    cells with _largest_blobs.
+    """
+    blobs = _largest_blobs(
+        _leaf_regions(board),
+        lambda block: colour if block.colour_index == colour else None)
+    return blobs.get(colour, 0)
+
+
 class BlobGoal(Goal):
     """Child class of Goal. This goal awards the most points to the user who
     has the most blocks that are connected.
@@ -193,31 +596,54 @@ class BlobGoal(Goal):
         The target colour for this goal, that is the colour to which
         this goal applies.
     """
-    def score(self, board: Block) -> int:
-        """returns the greatest number of blocks which are connected in board
+    def _score_indices(self, flat: List[List[int]]) -> int:
+        """returns the greatest number of blocks which are connected in the
+        flattened board
+        """
+        return _largest_blob([_column_runs(column, self.colour_index)
+                              for column in flat])
+
+    def _score_block(self, board: Block) -> int:
+        """returns the greatest number of blocks which are connected in
+        <board>, without flattening it
         """
-        best_score = 0
-        flat = _flatten(board)
-
-        board_size = len(flat)
-        visited = []  # this 2D list represents the blocks which have been
-        # checked
-        for _ in range(board_size):
-            # making every element of visited -1 because they haven't been
-            # visited yet
-            visited.append([-1] * board_size)
-        for i in range(board_size):
-            for j in range(board_size):
-                if visited[i][j] == -1:  # goes through every non-checked
-                    # element
-                    new = self._undiscovered_blob_size((i, j), flat, visited)
-                    # new is the new score using the position (i, j)
-                    best_score = _help_blob_score(best_score, new)
-                    # best score is the highest scoring blob
-        return best_score
+        return _blob_points(board, self.colour_index)
+
+    def _score_grid(self, grid: Any) -> int:
+        """returns the greatest number of blocks which are connected in the
+        board of <grid>. Working on the board's blocks is faster than
+        labelling the grid's unit cells.
+        """
+        return _blob_points(grid.board, self.colour_index)
+
+    def score_delta(self, board: Block,
+                    move: Tuple[str, Optional[int], Block]) -> int:
+        """returns how much <move> would change the greatest number of
+        connected blocks
+
+        The moves that cannot change any blob are recognised from the moved
+        block alone. Any other move is made, scored and undone again.
+        """
+        name, _, block = move
+        if name in ('rotate', 'swap'):
+            # Moving the cells around inside the block only matters if some,
+            # but not all, of them are of the target colour
+            some, every = _has_colour(block, self.colour_index)
+            if not some or every:
+                return 0
+        elif name == 'combine':
+            # The block only matters if it has a child of the target colour or
+            # would become the target colour
+            colour = block.combine_colour()
+            if colour is None or (colour != self.colour and
+                                  not _has_colour(block, self.colour_index)[0]):
+                return 0
+        elif name == 'paint' and not block.can_paint(self.colour_index):
+            return 0
+        return _journal_delta(self, board, move)
 
     def _undiscovered_blob_size(self, pos: Tuple[int, int],
-                                board: List[List[Tuple[int, int, int]]],
+                                board: List[List[int]],
                                 visited: List[List[int]]) -> int:
         """Return the size of the largest connected blob that (a) is of this
         Goal's target colour, (b) includes the cell at <pos>, and (c) involves
@@ -225,7 +651,8 @@ class BlobGoal(Goal):
 
         If <pos> is out of bounds for <board>, return 0.
 
-        <board> is the flattened board on which to search for the blob.
+        <board> is the flattened board on which to search for the blob, as
+        returned by _flatten_indices.
         <visited> is a parallel structure that, in each cell, contains:
             -1 if this cell has never been visited
             0  if this cell has been visited and discovered
@@ -237,27 +664,21 @@ class BlobGoal(Goal):
         either 0 or 1.
         """
         total = 0
-        if pos[0] < 0 or pos[0] >= len(board) or \
-                pos[1] < 0 or pos[1] >= len(board):  # position out of range
-            return 0
-        if visited[pos[0]][pos[1]] == -1:  # haven't looked at this position yet
-            if board[pos[0]][pos[1]] == self.colour:
-                total += 1  # get a point for the current block it's on
-                visited[pos[0]][pos[1]] = 1  # this block has now been visited
-                pos2 = (pos[0] + 1, pos[1])  # block to the right
-                total += self._undiscovered_blob_size(pos2, board, visited)
-                pos2 = (pos[0] - 1, pos[1])  # block to the left
-                total += self._undiscovered_blob_size(pos2, board, visited)
-                pos2 = (pos[0], pos[1] + 1)  # block above
-                total += self._undiscovered_blob_size(pos2, board, visited)
-                pos2 = (pos[0], pos[1] - 1)  # block below
-                total += self._undiscovered_blob_size(pos2, board, visited)
-
-            else:
-                # this block is not part of a blob so return 0
-                visited[pos[0]][pos[1]] = 0
-                return 0
-
+        # The cells still to be looked at. An explicit stack is used instead
+        # of recursion so that a large blob does not reach the recursion limit
+        stack = [pos]
+        while stack:
+            i, j = stack.pop()
+            if 0 <= i < len(board) and 0 <= j < len(board) and \
+                    visited[i][j] == -1:  # in range and not looked at yet
+                if board[i][j] == self.colour_index:
+                    total += 1  # get a point for the current block it's on
+                    visited[i][j] = 1  # this block has now been visited
+                    stack.extend([(i + 1, j), (i - 1, j), (i, j + 1),
+                                  (i, j - 1)])
+                else:
+                    # this block is not part of a blob
+                    visited[i][j] = 0
         return total
 
     def description(self) -> str:
@@ -267,12 +688,75 @@ class BlobGoal(Goal):
                ' as possible'
 
 
+# The scores worked out by board_scores, keyed by the fingerprint, level and
+# max_depth of the board. The fingerprint changes with every move, so a board
+# that has not changed finds its scores here. The oldest entries are removed
+# once there are more than _SCORE_CACHE_SIZE of them.
+_SCORE_CACHE: Dict[Tuple[int, int, int], Dict[type, List[int]]] = {}
+_SCORE_CACHE_SIZE = 64
+
+
+def board_scores(board: Block) -> Dict[type, List[int]]:
+    """Return the score of every PerimeterGoal and every BlobGoal on <board>,
+    as a dict from the goal class to the list of scores for each colour,
+    indexed by the colour's index in PALETTE.
+
+    All of the scores are worked out from one walk over the undivided blocks
+    of <board>. The blobs are found by _largest_blobs, as in _blob_points,
+    with each colour as its own group. The scores are remembered until the
+    board changes. The returned lists must not be changed.
+    """
+    key = (board.fingerprint(), board.level, board.max_depth)
+    if key in _SCORE_CACHE:
+        return _SCORE_CACHE[key]
+
+    side = 2 ** (board.max_depth - board.level)
+    leaves = list(_leaf_regions(board))
+    perimeter = [0] * len(PALETTE)
+    for block, column, row, cells in leaves:
+        perimeter[block.colour_index] += cells * (
+            (column == 0) + (row == 0) + (column + cells == side) +
+            (row + cells == side))
+    blob = [0] * len(PALETTE)
+    # Each colour is its own group, so only blocks of the same colour are
+    # joined
+    blobs = _largest_blobs(leaves, lambda block: block.colour_index)
+    for colour in blobs:
+        blob[colour] = blobs[colour]
+    if side == 1:
+        # The only cell is in all four edges, but it scores 2
+        perimeter = [points // 2 for points in perimeter]
+
+    scores = {PerimeterGoal: perimeter, BlobGoal: blob}
+    if len(_SCORE_CACHE) >= _SCORE_CACHE_SIZE:
+        del _SCORE_CACHE[next(iter(_SCORE_CACHE))]
+    _SCORE_CACHE[key] = scores
+    return scores
+
+
+def fused_score(board: Block, goal: Goal) -> int:
+    """Return the score for <goal> on <board>, using board_scores if <goal> is
+    a PerimeterGoal or a BlobGoal.
+
+    This is meant for scoring several goals on the same board: the first
+    goal pays for scoring every colour, and the others are looked up.
+    """
+    scores = board_scores(board)
+    for goal_class in scores:
+        if isinstance(goal, goal_class):
+            colour_scores = scores[goal_class]
+            if goal.colour_index < len(colour_scores):
+                return colour_scores[goal.colour_index]
+            return 0
+    return goal.score(board)
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config={
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'block', 'settings',
-            'math', '__future__'
+            'math', '__future__', 'numpy'
         ],
         'max-attributes': 15
     })
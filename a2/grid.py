@@ -0,0 +1,164 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the BoardGrid class, a flattened copy of a board that is
+kept up to date as moves are made on the board.
+
+Flattening a board visits every unit cell, and the goals used to flatten the
+board again every time they scored it. A BoardGrid is flattened once, when
+it is attached to the root of a board. After that, every move made on a block
+in the board only rewrites the square of unit cells covered by that block:
+a rotate turns the square a quarter turn, a swap exchanges its halves, and
+the other moves fill it in again from the block. PerimeterGoal scores a board
+with a grid from the cells on the edges of the grid.
+
+BoardGrid uses NumPy. Use attach_grid to attach a grid only when NumPy is
+installed.
+"""
+from __future__ import annotations
+from typing import Any, Optional, Tuple
+
+from block import Block
+from goal import _block_region, _flatten_array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def attach_grid(board: Block) -> Optional[BoardGrid]:
+    """Attach a new BoardGrid to <board> and return it, or return None if
+    NumPy is not installed.
+
+    Precondition: board.level == 0
+    """
+    if numpy is None:
+        return None
+    return BoardGrid(board)
+
+
+class BoardGrid:
+    """A flattened board that is patched by every move made on the board.
+
+    === Public Attributes ===
+    board:
+        The root of the board this grid is attached to.
+    cells:
+        The unit cells of <board>, in the same layout as the array returned
+        by goal._flatten_array.
+
+    === Representation Invariants ===
+    - board._grid is self, until detach is called
+    - cells is equal to _flatten_array(board)
+    """
+    board: Block
+    cells: Any
+
+    def __init__(self, board: Block) -> None:
+        """Flatten <board> and attach this grid to it.
+
+        Preconditions:
+            - NumPy is installed
+            - board.level == 0
+        """
+        self.board = board
+        self.cells = _flatten_array(board)
+        board._grid = self
+
+    def detach(self) -> None:
+        """Stop patching this grid when moves are made on its board.
+        """
+        if self.board._grid is self:
+            self.board._grid = None
+
+    def perimeter(self, colour: int) -> int:
+        """Return the score of a PerimeterGoal for the colour at index
+        <colour> in PALETTE.
+        """
+        cells = self.cells
+        # A corner cell is in two of the edges, so it is counted twice
+        edges = numpy.concatenate((cells[0], cells[-1], cells[:, 0],
+                                   cells[:, -1]))
+        points = int(numpy.count_nonzero(edges == colour))
+        if len(cells) == 1:
+            # The only cell is in all four edges, but it scores 2
+            return points // 2
+        return points
+
+    def _patch(self, region: Tuple[int, int, int], values: Any) -> None:
+        """Replace the unit cells in <region> with <values>, which is either
+        an array of the same shape or a single colour index.
+        """
+        column, row, cells = region
+        self.cells[column:column + cells, row:row + cells] = values
+
+    def refill(self, block: Block) -> None:
+        """Fill in the unit cells of <block> again, after its colour or
+        children have changed.
+
+        A leaf without a colour is in the middle of a move, so it is skipped
+        until its colour is set.
+        """
+        children = block.children
+        if not children and block.colour_index is None:
+            return
+        region = _block_region(self.board, block)
+        if region is not None:
+            if children:
+                self._patch(region, _flatten_array(block))
+            else:
+                self._patch(region, block.colour_index)
+
+    def rotated(self, block: Block, direction: int) -> None:
+        """Turn the unit cells of <block> clockwise (1) or counter-clockwise
+        (3), after <block> has been rotated in <direction>.
+        """
+        region = _block_region(self.board, block)
+        if region is not None:
+            column, row, cells = region
+            square = self.cells[column:column + cells, row:row + cells]
+            # cells[i, j] is column i and row j, so numpy.rot90 turns the
+            # square clockwise
+            turns = 1 if direction == 1 else -1
+            self._patch(region, numpy.rot90(square, turns).copy())
+
+    def swapped(self, block: Block, direction: int) -> None:
+        """Exchange the left and right (0) or top and bottom (1) halves of the
+        unit cells of <block>, after <block> has been swapped in <direction>.
+        """
+        region = _block_region(self.board, block)
+        if region is not None:
+            column, row, cells = region
+            square = self.cells[column:column + cells, row:row + cells]
+            self._patch(region, numpy.roll(square, cells // 2,
+                                           axis=direction))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'numpy', 'block',
+            'goal'
+        ],
+        'max-attributes': 15
+    })
@@ -0,0 +1,253 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the MoveIndex class, which lists the legal moves on a
+Blocky board and draws a random one without searching the board.
+
+A MoveIndex keeps, for each level of the board, the blocks that can be
+rotated or swapped, the leaves that can be smashed, the blocks that can be
+combined and, for each colour, the leaves at max_depth of that colour. It is
+attached to the root of the board like a grid.BoardGrid and is told whenever
+the colour or children of a block change, so after a move only the blocks
+that move replaced are indexed again. Rotating or swapping a block moves its
+descendants around but changes none of these lists.
+
+Every legal move is equally likely to be drawn by random_move: a subdivided
+block can be rotated two ways and swapped two ways, so it accounts for four
+moves, and every other candidate for one.
+"""
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Tuple
+import random
+
+from block import Block
+from settings import colour_index
+
+# The four moves that every subdivided block can make.
+_PARENT_ACTIONS = [('rotate', 1), ('rotate', 3), ('swap', 0), ('swap', 1)]
+
+
+def move_index(board: Block) -> MoveIndex:
+    """Return the MoveIndex attached to <board>, attaching a new one first if
+    there is none.
+
+    Precondition: board.level == 0
+    """
+    if board._moves is None:
+        return MoveIndex(board)
+    return board._moves
+
+
+class MoveIndex:
+    """The legal moves on a board, kept up to date as moves are made on it.
+
+    === Public Attributes ===
+    board:
+        The root of the board this index is attached to.
+
+    === Representation Invariants ===
+    - board._moves is self, until detach is called
+    - a block is in _lists[key] iff it is in the board and is a candidate of
+      the kind described by key
+    """
+    # === Private Attributes ===
+    # _lists:
+    #   The candidates of each kind, keyed by:
+    #       ('parent', level): the subdivided blocks at <level>
+    #       ('smash', level): the leaves at <level> that can be smashed
+    #       ('combine', level): the blocks at <level> that can be combined
+    #       ('paint', colour): the leaves at max_depth of the colour at index
+    #           <colour> in PALETTE
+    # _places:
+    #   _places[(id(block), kind)] is the key of the list that holds <block>
+    #   as a candidate of <kind>, and its index in that list.
+    # _children:
+    #   _children[id(block)] is the list of children that the subdivided
+    #   <block> had when it was last indexed, so that they can be taken out
+    #   of the index after they have been replaced.
+    board: Block
+    _lists: Dict[Tuple[str, int], List[Block]]
+    _places: Dict[Tuple[int, str], Tuple[Tuple[str, int], int]]
+    _children: Dict[int, List[Block]]
+
+    def __init__(self, board: Block) -> None:
+        """Index the legal moves on <board> and attach this index to it.
+
+        Precondition: board.level == 0
+        """
+        self.board = board
+        self._lists = {}
+        self._places = {}
+        self._children = {}
+        self._add_subtree(board)
+        board._moves = self
+
+    def detach(self) -> None:
+        """Stop updating this index when moves are made on its board.
+        """
+        if self.board._moves is self:
+            self.board._moves = None
+
+    def _add(self, kind: str, key: Tuple[str, int], block: Block) -> None:
+        """Add <block> to the list at <key> as a candidate of <kind>, unless it
+        is already a candidate of that kind.
+        """
+        place = (id(block), kind)
+        if place not in self._places:
+            blocks = self._lists.setdefault(key, [])
+            self._places[place] = (key, len(blocks))
+            blocks.append(block)
+
+    def _remove(self, kind: str, block: Block) -> None:
+        """Remove <block> as a candidate of <kind>, if it is one.
+
+        The last block in the list takes its place, so nothing is shifted.
+        """
+        location = self._places.pop((id(block), kind), None)
+        if location is not None:
+            key, index = location
+            blocks = self._lists[key]
+            last = blocks.pop()
+            if index < len(blocks):
+                blocks[index] = last
+                self._places[(id(last), kind)] = (key, index)
+
+    def _update_combine(self, block: Block) -> None:
+        """Add or remove <block> as a candidate for combine, depending on
+        whether it can be combined now.
+        """
+        if block.can_combine():
+            self._add('combine', ('combine', block.level), block)
+        else:
+            self._remove('combine', block)
+
+    def _add_subtree(self, block: Block) -> None:
+        """Add <block> and its descendants to this index.
+        """
+        stack = [block]
+        while stack:
+            block = stack.pop()
+            children = block.children
+            if children:
+                self._add('parent', ('parent', block.level), block)
+                self._children[id(block)] = list(children)
+                self._update_combine(block)
+                stack.extend(children)
+            elif block.level == block.max_depth:
+                self._add('paint', ('paint', block.colour_index), block)
+            elif block.level != 0:
+                # The top-level block is never smashed
+                self._add('smash', ('smash', block.level), block)
+
+    def _remove_subtree(self, block: Block) -> None:
+        """Remove <block> and the descendants it had when it was last indexed
+        from this index.
+        """
+        stack = [block]
+        while stack:
+            block = stack.pop()
+            for kind in ('parent', 'combine', 'paint', 'smash'):
+                self._remove(kind, block)
+            stack.extend(self._children.pop(id(block), []))
+
+    def refill(self, block: Block) -> None:
+        """Index <block> again, after its colour or children have changed.
+
+        A leaf without a colour is in the middle of a move, so it is skipped
+        until its colour is set.
+        """
+        if not block.children and block.colour_index is None:
+            return
+        self._remove_subtree(block)
+        self._add_subtree(block)
+        parent = block._parent
+        if parent is not None:
+            # A new colour for a child can change the parent's majority
+            self._update_combine(parent)
+
+    def count(self, colour: Tuple[int, int, int]) -> int:
+        """Return the number of legal moves on the board for a player whose
+        goal is <colour>, which is the colour used by paint.
+        """
+        index = colour_index(colour)
+        total = 0
+        for key, blocks in self._lists.items():
+            if key[0] == 'parent':
+                total += len(_PARENT_ACTIONS) * len(blocks)
+            elif key != ('paint', index):
+                total += len(blocks)
+        return total
+
+    def legal_moves(self, colour: Tuple[int, int, int]) \
+            -> Iterator[Tuple[str, Optional[int], Block]]:
+        """Yield every legal move on the board for a player whose goal is
+        <colour>, as (action name, direction, block) tuples.
+
+        The moves are the ones that were legal when this was called. A move
+        made and undone between two of them does not change what is yielded.
+        """
+        index = colour_index(colour)
+        for key, blocks in list(self._lists.items()):
+            kind = key[0]
+            if kind == 'parent':
+                for block in list(blocks):
+                    for name, direction in _PARENT_ACTIONS:
+                        yield name, direction, block
+            elif key != ('paint', index):
+                for block in list(blocks):
+                    yield kind, None, block
+
+    def random_move(self, colour: Tuple[int, int, int]) \
+            -> Optional[Tuple[str, Optional[int], Block]]:
+        """Return a legal move on the board for a player whose goal is
+        <colour>, drawn uniformly at random, or None if there is no legal
+        move.
+
+        Only the lists of candidates are counted, so this takes time
+        proportional to the number of lists, not to the size of the board.
+        """
+        pick = random.randrange(self.count(colour) or 1)
+        index = colour_index(colour)
+        for key, blocks in self._lists.items():
+            kind = key[0]
+            if kind == 'parent':
+                if pick < len(_PARENT_ACTIONS) * len(blocks):
+                    name, direction = \
+                        _PARENT_ACTIONS[pick % len(_PARENT_ACTIONS)]
+                    return name, direction, \
+                        blocks[pick // len(_PARENT_ACTIONS)]
+                pick -= len(_PARENT_ACTIONS) * len(blocks)
+            elif key != ('paint', index):
+                if pick < len(blocks):
+                    return kind, None, blocks[pick]
+                pick -= len(blocks)
+        return None
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__',
+            'block', 'settings'
+        ],
+        'max-attributes': 15
+    })
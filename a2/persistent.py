@@ -0,0 +1,333 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the PersistentBlock class, an immutable version of Block
+that can be used to try out moves without copying the whole board.
+
+A PersistentBlock never changes after it is created. A move returns a new
+root that shares every subtree the move did not touch with the old root, so
+only the blocks on the path from the root to the moved block are copied.
+Like Block.rotate, a rotate only records the rotation on the new copy of the
+rotated block, so even the rotated subtree is shared, and its blocks are
+worked out as they are read. Because of that, "copying" a PersistentBlock is
+free: the copy is the block itself.
+
+PersistentBlock stands on its own: no player in the game uses it, since the
+players try out moves in place with block.MoveJournal instead. It is meant
+for code that wants to keep many boards around at once.
+
+PersistentBlocks have the same children, colour, level, max_depth and size
+attributes as Block, so the functions in goal.py can score them directly.
+They do not store a position, since a shared subtree can sit in a different
+place on each board that uses it.
+"""
+from __future__ import annotations
+from typing import List, Optional, Tuple
+import random
+import math
+
+from block import Block, _COMPOSITION, _IDENTITY, _ROTATION, _SWAP_ORDER
+from settings import colour_index, COLOUR_LIST
+
+
+def block_path(board: Block, target: Block) -> List[int]:
+    """Return the list of child indices that leads from <board> to <target>.
+
+    Precondition: <target> is <board> or one of its descendants.
+    """
+    path = []
+    node = board
+    x, y = target.position
+    while node is not target and node.level < target.level:
+        for i in range(4):
+            child = node.children[i]
+            if child.position[0] <= x < child.position[0] + child.size and \
+                    child.position[1] <= y < child.position[1] + child.size:
+                path.append(i)
+                node = child
+                break
+    return path
+
+
+class PersistentBlock:
+    """An immutable square block in the Blocky game.
+
+    === Public Attributes ===
+    size:
+        The height and width of this square block.
+    colour:
+        If this block is not subdivided, <colour> stores its colour. Otherwise,
+        <colour> is None.
+    level:
+        The level of this block within the overall block structure.
+    max_depth:
+        The deepest level allowed in the overall block structure.
+    children:
+        The blocks into which this block is subdivided, in the same order as
+        Block.children. Other PersistentBlocks may share these children.
+
+    === Representation Invariants ===
+    - the same invariants as Block, ignoring position
+    - no attribute but <_resolved> is changed after __init__ returns
+    """
+    # === Private Attributes ===
+    # _children:
+    #   The children of this block before <_transform> is applied to them.
+    # _transform:
+    #   A transform from block._TRANSFORMS of this block's subtree that has
+    #   not been carried out yet.
+    # _resolved:
+    #   The children with <_transform> carried out, or None until <children>
+    #   is first read.
+    size: int
+    colour: Optional[Tuple[int, int, int]]
+    level: int
+    max_depth: int
+    _children: Tuple[PersistentBlock, ...]
+    _transform: Tuple[int, ...]
+    _resolved: Optional[Tuple[PersistentBlock, ...]]
+
+    def __init__(self, size: int, colour: Optional[Tuple[int, int, int]],
+                 level: int, max_depth: int,
+                 children: Tuple[PersistentBlock, ...] = ()) -> None:
+        """Initialize this block with dimensions <size> by <size>, the given
+        <colour>, at <level>, and with the given <children>.
+        """
+        self.size = size
+        self.colour = colour
+        self.level = level
+        self.max_depth = max_depth
+        self._children = children
+        self._transform = _IDENTITY
+        self._resolved = None
+
+    @property
+    def children(self) -> Tuple[PersistentBlock, ...]:
+        """The blocks into which this block is subdivided, in the same order
+        as Block.children.
+        """
+        if self._resolved is None:
+            transform = self._transform
+            if transform is _IDENTITY:
+                self._resolved = self._children
+            else:
+                self._resolved = tuple(
+                    self._children[transform[i]]._transformed(transform)
+                    for i in range(4))
+        return self._resolved
+
+    def _transformed(self, transform: Tuple[int, ...]) -> PersistentBlock:
+        """Return this block with <transform> applied to it, sharing this
+        block's children.
+        """
+        if len(self._children) != 4:
+            return self
+        block = PersistentBlock(self.size, None, self.level, self.max_depth,
+                                self._children)
+        block._transform = _COMPOSITION[self._transform, transform]
+        return block
+
+    @property
+    def colour_index(self) -> Optional[int]:
+        """The index of this block's colour in PALETTE, or None if it is
+        subdivided.
+        """
+        return None if self.colour is None else colour_index(self.colour)
+
+    @staticmethod
+    def from_block(block: Block) -> PersistentBlock:
+        """Return a PersistentBlock holding the same blocks as <block>.
+        """
+        children = tuple(PersistentBlock.from_block(child)
+                         for child in block.children)
+        return PersistentBlock(block.size, block.colour, block.level,
+                               block.max_depth, children)
+
+    def to_block(self, position: Tuple[int, int] = (0, 0)) -> Block:
+        """Return a new Block tree with the same blocks as this one, whose
+        upper left corner is at <position>.
+        """
+        block = Block(position, self.size, self.colour, self.level,
+                      self.max_depth)
+        if len(self.children) == 4:
+            positions = block._children_positions()
+            for i in range(4):
+                block.children.append(self.children[i].to_block(positions[i]))
+        return block
+
+    def create_copy(self) -> PersistentBlock:
+        """Return a copy of this block.
+
+        Since a PersistentBlock cannot be changed, it is its own copy.
+        """
+        return self
+
+    def smashable(self) -> bool:
+        """Return True iff this block can be smashed.
+        """
+        return self.level != self.max_depth and len(self.children) == 0
+
+    def _replace(self, path: List[int], index: int,
+                 new_block: Optional[PersistentBlock]) \
+            -> Optional[PersistentBlock]:
+        """Return a copy of this block in which the descendant reached by
+        following path[index:] is replaced by <new_block>.
+
+        Only the blocks along the path are copied. Return None if <new_block>
+        is None, which is how an invalid move is reported.
+        """
+        if new_block is None:
+            return None
+        if index == len(path):
+            return new_block
+        children = list(self.children)
+        children[path[index]] = children[path[index]]._replace(
+            path, index + 1, new_block)
+        return PersistentBlock(self.size, None, self.level, self.max_depth,
+                               tuple(children))
+
+    def _find(self, path: List[int]) -> PersistentBlock:
+        """Return the descendant of this block reached by following <path>.
+        """
+        block = self
+        for i in path:
+            block = block.children[i]
+        return block
+
+    def _smashed(self) -> Optional[PersistentBlock]:
+        """Return this block sub-divided into four random children, or None if
+        it cannot be smashed.
+        """
+        if not self.smashable():
+            return None
+        size = round(self.size / 2.0)
+        children = []
+        for _ in range(4):
+            child = PersistentBlock(size, random.choice(COLOUR_LIST),
+                                    self.level + 1, self.max_depth)
+            if random.random() < math.exp(-0.25 * child.level) and \
+                    child.smashable():
+                child = child._smashed()
+            children.append(child)
+        return PersistentBlock(self.size, None, self.level, self.max_depth,
+                               tuple(children))
+
+    def _rotated(self, direction: int) -> PersistentBlock:
+        """Return this block rotated clockwise (1) or counter-clockwise (3).
+
+        Only the rotation is recorded, so this takes constant time.
+        """
+        return self._transformed(_ROTATION[direction])
+
+    def _combined(self) -> Optional[PersistentBlock]:
+        """Return this block turned into a leaf of its children's majority
+        colour, or None if it cannot be combined.
+        """
+        if len(self.children) != 4 or self.level != self.max_depth - 1:
+            return None
+        colours = [child.colour for child in self.children]
+        majority = []
+        for colour in colours:
+            if colours.count(colour) >= 2 and colour not in majority:
+                majority.append(colour)
+        if len(majority) != 1:
+            return None
+        return PersistentBlock(self.size, majority[0], self.level,
+                               self.max_depth)
+
+    def smash(self, path: List[int]) -> Optional[PersistentBlock]:
+        """Return the board in which the block at <path> has been smashed, or
+        None if that block cannot be smashed.
+        """
+        return self._replace(path, 0, self._find(path)._smashed())
+
+    def swap(self, path: List[int], direction: int) \
+            -> Optional[PersistentBlock]:
+        """Return the board in which the children of the block at <path> have
+        been swapped horizontally (0) or vertically (1), or None if that block
+        has no children.
+        """
+        block = self._find(path)
+        if len(block.children) != 4:
+            return None
+        children = tuple(block.children[i] for i in _SWAP_ORDER[direction])
+        return self._replace(path, 0, PersistentBlock(
+            block.size, None, block.level, block.max_depth, children))
+
+    def rotate(self, path: List[int], direction: int) \
+            -> Optional[PersistentBlock]:
+        """Return the board in which the block at <path> has been rotated
+        clockwise (1) or counter-clockwise (3), or None if that block has no
+        children.
+        """
+        block = self._find(path)
+        if len(block.children) != 4:
+            return None
+        return self._replace(path, 0, block._rotated(direction))
+
+    def paint(self, path: List[int], colour: Tuple[int, int, int]) \
+            -> Optional[PersistentBlock]:
+        """Return the board in which the block at <path> has been painted
+        <colour>, or None if it cannot be painted that colour.
+        """
+        block = self._find(path)
+        if block.level != block.max_depth or block.colour == colour:
+            return None
+        return self._replace(path, 0, PersistentBlock(
+            block.size, colour, block.level, block.max_depth))
+
+    def combine(self, path: List[int]) -> Optional[PersistentBlock]:
+        """Return the board in which the block at <path> has been combined, or
+        None if it cannot be combined.
+        """
+        return self._replace(path, 0, self._find(path)._combined())
+
+    def apply(self, path: List[int], action: Tuple[str, Optional[int]],
+              colour: Tuple[int, int, int]) -> Optional[PersistentBlock]:
+        """Return the board that results from doing <action> to the block at
+        <path>, or None if the action cannot be done.
+
+        <colour> is the colour used by a paint action.
+        """
+        name, direction = action
+        if name == 'rotate':
+            return self.rotate(path, direction)
+        elif name == 'swap':
+            return self.swap(path, direction)
+        elif name == 'smash':
+            return self.smash(path)
+        elif name == 'combine':
+            return self.combine(path)
+        elif name == 'paint':
+            return self.paint(path, colour)
+        return None
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'random', 'typing', '__future__', 'math',
+            'block', 'settings'
+        ],
+        'max-attributes': 15,
+        'max-args': 6
+    })
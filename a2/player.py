@@ -23,31 +23,49 @@ This file contains the hierarchy of player classes.
 """
 from __future__ import annotations
 from typing import List, Optional, Tuple
+from collections import OrderedDict
+import math
 import random
+import time
 import pygame
 
-from block import Block
-from goal import Goal, generate_goals
+from block import Block, MoveJournal
+from goal import Goal, fused_score, generate_goals
+from moves import move_index
 
-from actions import KEY_ACTION, ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, \
-    SWAP_HORIZONTAL, SWAP_VERTICAL, SMASH, PASS, PAINT, COMBINE
+from actions import ACTION_PENALTY, KEY_ACTION, PASS, SMASH
 
 
-def create_players(num_human: int, num_random: int, smart_players: List[int]) \
+def create_players(num_human: int, num_random: int, smart_players: List[int],
+                   lookahead_players: Optional[List[int]] = None,
+                   mcts_players: Optional[List[float]] = None) \
         -> List[Player]:
     """Return a new list of Player objects.
 
     <num_human> is the number of human players, <num_random> is the number of
     random players, and <smart_players> is a list of difficulty levels for each
-    SmartPlayer that is to be created.
+    SmartPlayer that is to be created. <lookahead_players>, if given, is a
+    list of the number of plies searched by each LookaheadPlayer that is to be
+    created, and <mcts_players>, if given, is a list of the number of seconds
+    each MCTSPlayer that is to be created searches for.
 
     The list should contain <num_human> HumanPlayer objects first, then
     <num_random> RandomPlayer objects, then the same number of SmartPlayer
-    objects as the length of <smart_players>. The difficulty levels in
-    <smart_players> should be applied to each SmartPlayer object, in order.
+    objects as the length of <smart_players>, then the same number of
+    LookaheadPlayer objects as the length of <lookahead_players>, then the
+    same number of MCTSPlayer objects as the length of <mcts_players>. The
+    difficulty levels in <smart_players>, the plies in <lookahead_players>
+    and the budgets in <mcts_players> should be applied to each player, in
+    order.
     """
+    if lookahead_players is None:
+        lookahead_players = []
+    if mcts_players is None:
+        mcts_players = []
     player_list = []
-    goals = generate_goals(num_human + num_random + len(smart_players))
+    num_searching = len(smart_players) + len(lookahead_players)
+    goals = generate_goals(num_human + num_random + num_searching +
+                           len(mcts_players))
     i = 0
     while i < num_human:  # creates humans first
         player_list.append(HumanPlayer(i, goals[i]))
@@ -59,6 +77,16 @@ def create_players(num_human: int, num_random: int, smart_players: List[int]) \
         index = i - num_human - num_random
         player_list.append((SmartPlayer(i, goals[i], smart_players[index])))
         i += 1
+    while i < num_random + num_human + num_searching:
+        # lookahead players, who know every goal
+        index = i - num_human - num_random - len(smart_players)
+        player_list.append(LookaheadPlayer(i, goals,
+                                           lookahead_players[index]))
+        i += 1
+    while i < len(goals):  # MCTS players
+        index = i - num_human - num_random - num_searching
+        player_list.append(MCTSPlayer(i, goals[i], mcts_players[index]))
+        i += 1
     return player_list
 
 
@@ -225,101 +253,6 @@ class HumanPlayer(Player):
             return move
 
 
-def _get_rand_block(board_copy: Block, col: Tuple[int, int, int]) -> \
-        Optional[Tuple[str, Optional[int], Block]]:
-    """ This private function is used by generate_move() for both random player
-    and smart player. This finds a random action, and a valid block for the
-    action.
-    """
-
-    num_actions = len(KEY_ACTION)
-    rand_num = random.randint(0, num_actions - 2)
-    # This will be used to get a random action from the dictionary of actions.
-    counter = 0
-    action = None
-
-    for key in KEY_ACTION:  # getting the random action
-        if counter == rand_num:
-            action = KEY_ACTION[key]
-            break
-        counter += 1
-
-    if action in (ROTATE_CLOCKWISE, ROTATE_COUNTER_CLOCKWISE, SWAP_HORIZONTAL,
-                  SWAP_VERTICAL):
-        # I put these actions together because they all have the same
-        # requirements for the action to work
-        new_level = random.randint(0, board_copy.max_depth - 1)
-        # The blocks for these actions must have children so a block at
-        # max_depth is not possible
-        new_block = _find_block(board_copy, new_level, action[0])
-        random.shuffle(new_block)
-        for possible_block in new_block:
-            # returns an action and a block which is viable together
-            if len(possible_block.children) == 4:
-                return action[0], action[1], possible_block
-
-    elif action == SMASH and board_copy.max_depth > 1:
-        # For smash to work, max_depth must be greater than 1
-        new_level = random.randint(1, board_copy.max_depth - 1)
-        # smash can't be performed on a block at level 0 or max_depth
-        new_block = _find_block(board_copy, new_level, action[0])
-        random.shuffle(new_block)
-        for possible_block in new_block:
-            # returns an action and a block which is viable together
-            if possible_block.smashable():
-                # I'm checking to see if this block is viable for smash() and if
-                # it is then I return it
-                return action[0], action[1], possible_block
-    elif action == COMBINE:
-        new_level = board_copy.max_depth - 1
-        # combine only works at this level
-        new_block = _find_block(board_copy, new_level, action[0])
-        random.shuffle(new_block)
-        for possible_block in new_block:
-            # returns an action and a block which is viable together
-            copy = possible_block.create_copy()
-            if copy.combine():
-                # checking to see of the block is viable for combine()
-                return action[0], action[1], possible_block
-    elif action == PAINT:
-        new_level = board_copy.max_depth
-        # only works at max_depth
-        new_block = _find_block(board_copy, new_level, action[0])
-        random.shuffle(new_block)
-        for possible_block in new_block:
-            # returns an action and a block which is viable together
-            copy = possible_block.create_copy()
-            if copy.paint(col):
-                # checking to see of the block is viable for paint()
-                return action[0], action[1], possible_block
-    _get_rand_block(board_copy, col)
-    # when no action is returned call the function again
-    return None
-
-
-def _find_block(fake_board: Block, level: int, action: str) -> \
-        List[Optional[Block]]:
-    """This is a helper method for _get_rand_block(). This returns a list of
-    the possible blocks at the given level in the given fake_board. If there is
-    no such block at level then return empty list.
-    """
-    block_list = []
-    if fake_board.level == level:
-        if action in ('smash', 'paint'):  # these actions require 0 children
-            if len(fake_board.children) == 0:
-                block_list.append(fake_board)
-        else:  # all other actions require 4 children
-            if len(fake_board.children) == 4:
-                block_list.append(fake_board)
-    elif fake_board.level < level and len(fake_board.children) == 4:
-        # haven't reached the required level yet so recurse on the children
-        block_list.extend(_find_block(fake_board.children[0], level, action))
-        block_list.extend(_find_block(fake_board.children[1], level, action))
-        block_list.extend(_find_block(fake_board.children[2], level, action))
-        block_list.extend(_find_block(fake_board.children[3], level, action))
-    return block_list
-
-
 class RandomPlayer(Player):
     """A random player which chooses completely random moves
     """
@@ -342,7 +275,8 @@ class RandomPlayer(Player):
 
     def generate_move(self, board: Block) ->\
             Optional[Tuple[str, Optional[int], Block]]:
-        """Return a valid, randomly generated move.
+        """Return a valid, randomly generated move, or PASS if no move can
+        be performed on the <board>.
 
         A valid move is a move other than PASS that can be successfully
         performed on the <board>.
@@ -352,18 +286,24 @@ class RandomPlayer(Player):
 
         if not self._proceed:
             return None
-        board_copy = board.create_copy()
-        new_block = _get_rand_block(board_copy, self.goal.colour)
+        new_block = move_index(board).random_move(self.goal.colour)
         # new_block is a tuple of the action string, action int, and the block
-        # the action is performed on
-        if new_block is None:  # couldn't find a viable action
-            return None
-        else:
-            self._proceed = False  # Must set to False before returning!
-            block = _get_block(board, new_block[2].position, new_block[2].level)
-            # this block is the same as the block from new_block except it is
-            # part of <board>
-            return new_block[0], new_block[1], block
+        # the action is performed on, drawn from the legal moves on <board>
+        self._proceed = False  # Must set to False before returning!
+        if new_block is None:  # there is no legal move, so pass
+            return PASS[0], PASS[1], board
+        return new_block
+
+
+def _tie_key(move: Tuple[str, Optional[int], Block]) \
+        -> Tuple[int, Tuple[int, int], str, int]:
+    """Return the key used to choose between moves that change the score by
+    the same amount: the move on the highest block wins, then the one
+    furthest up and to the left, then the first action name and direction.
+    """
+    name, direction, block = move
+    return block.level, block.position, name, \
+        -1 if direction is None else direction
 
 
 class SmartPlayer(Player):
@@ -373,13 +313,19 @@ class SmartPlayer(Player):
     # _proceed:
     #   True when the player should make a move, False when the player should
     #   wait.
+    # _exhaustive:
+    #   True if this player scores every legal move instead of <_difficulty>
+    #   random ones.
     _proceed: bool
     _difficulty: int
+    _exhaustive: bool
 
-    def __init__(self, player_id: int, goal: Goal, difficulty: int) -> None:
+    def __init__(self, player_id: int, goal: Goal, difficulty: int,
+                 exhaustive: bool = False) -> None:
         Player.__init__(self, player_id, goal)
         self._proceed = False
         self._difficulty = difficulty
+        self._exhaustive = exhaustive
 
     def get_selected_block(self, board: Block) -> Optional[Block]:
         return None
@@ -398,55 +344,475 @@ class SmartPlayer(Player):
         performed on the <board>. If no move can be found that is better than
         the current score, this player will pass.
 
+        If this player is exhaustive, every legal move other than smash is
+        assessed once, and ties are broken the same way every time, so the
+        move returned is the best one there is. Smash is left out since the
+        blocks it makes are random, so its score is not known before it is
+        made.
+
         This function does not mutate <board>.
         """
         if not self._proceed:
             return None  # Do not remove
 
-        first_score = self.goal.score(board)  # score before a move is chosen
-        best_score = None  # the score of the best performing action
+        best_delta = None  # the score change of the best performing action
         best = None  # the action which outputs the best score
 
-        for _ in range(self._difficulty):
-            board_copy = board.create_copy()
-            next_move = _get_rand_block(board_copy, self.goal.colour)
-            # next_move is a random move
+        # Each candidate is only scored by how much it changes the score, so
+        # the board is never copied or scored in full
+        moves = move_index(board)
+        if self._exhaustive:
+            candidates = [move for move in moves.legal_moves(self.goal.colour)
+                          if move[0] != SMASH[0]]
+        else:
+            candidates = [moves.random_move(self.goal.colour)
+                          for _ in range(self._difficulty)]
+        for next_move in candidates:
+            # next_move is a legal move on <board>, which is not mutated
             if next_move is not None:
-                # here I am mutating the copy of the board to see how many
-                # points next_move gets
-                if next_move[0] == 'rotate':
-                    next_move[2].rotate(next_move[1])
-                    # next_move[1] is the direction the block is rotating
-                elif next_move[0] == 'swap':
-                    next_move[2].swap(next_move[1])
-                    # next_move[1] is the direction the block is swapping
-                elif next_move[0] == 'smash':
-                    next_move[2].smash()
-                elif next_move[0] == 'combine':
-                    next_move[2].combine()
-                else:
-                    next_move[2].paint(self.goal.colour)
-
-                new_score = self.goal.score(board_copy)
-                # new_score is the score after the action is performed
-                if best_score is None:
-                    # setting a new best_score and best
-                    best_score = new_score
-                    best = next_move
-                elif best is not None and new_score > best_score:
-                    # setting a new best_score and best
-                    best_score = new_score
+                delta = self.goal.score_delta(board, next_move)
+                if best_delta is None or delta > best_delta or \
+                        (self._exhaustive and delta == best_delta and
+                         _tie_key(next_move) < _tie_key(best)):
+                    # setting a new best_delta and best
+                    best_delta = delta
                     best = next_move
 
         self._proceed = False  # Must set to False before returning!
-        if best is None or best_score <= first_score:
+        if best is None or best_delta <= 0:
             # when there is no best score then the player passes
             return PASS[0], PASS[1], board
         else:
-            block = _get_block(board, best[2].position, best[2].level)
-            # this block is the same as the block from new_block except it is
-            # part of <board>
-            return best[0], best[1], block
+            return best
+
+
+class _SearchNode:
+    """A node in the search tree of an MCTSPlayer.
+
+    === Public Attributes ===
+    move:
+        The move that leads from the parent of this node to this node, or
+        None for the root.
+    parent:
+        The parent of this node, or None for the root.
+    children:
+        The nodes for the moves from this node that have been tried.
+    untried:
+        The legal moves from this node that have no node yet, or None if
+        they have not been listed.
+    visits:
+        The number of simulations that passed through this node.
+    total:
+        The sum of the values of those simulations.
+    """
+    move: Optional[Tuple[str, Optional[int], Block]]
+    parent: Optional[_SearchNode]
+    children: List[_SearchNode]
+    untried: Optional[List[Tuple[str, Optional[int], Block]]]
+    visits: int
+    total: float
+
+    def __init__(self, move: Optional[Tuple[str, Optional[int], Block]],
+                 parent: Optional[_SearchNode]) -> None:
+        """Initialize a node for <move>, made after the moves of <parent>.
+        """
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.total = 0.0
+
+
+class MCTSPlayer(Player):
+    """A player which chooses its moves with a Monte Carlo tree search (UCT)
+    that stops after a fixed amount of time.
+
+    Each simulation makes moves on the board itself with a MoveJournal and
+    undoes them again, so the board is never copied. The moves down the tree
+    are chosen by UCT, and the rest of the simulation is random legal moves
+    drawn from the board's MoveIndex. A simulation is worth the change in
+    this player's score, less the ACTION_PENALTY of every move in it, as in
+    GameData.calculate_score.
+
+    Only this player's moves are searched; the moves of the other players in
+    between are not known, so they are not simulated. Smash is never tried,
+    since the blocks it makes are random and differ every time it is made.
+    """
+    # === Private Attributes ===
+    # _proceed:
+    #   True when the player should make a move, False when the player should
+    #   wait.
+    # _budget:
+    #   The number of seconds that generate_move searches for.
+    # _depth:
+    #   The number of moves in each simulation, counting the moves chosen
+    #   down the tree.
+    # _exploration:
+    #   How much UCT favours moves that have been tried less often.
+    _proceed: bool
+    _budget: float
+    _depth: int
+    _exploration: float
+
+    def __init__(self, player_id: int, goal: Goal, budget: float = 0.5,
+                 depth: int = 3, exploration: float = math.sqrt(2)) -> None:
+        Player.__init__(self, player_id, goal)
+        self._proceed = False
+        self._budget = budget
+        self._depth = depth
+        self._exploration = exploration
+
+    def get_selected_block(self, board: Block) -> Optional[Block]:
+        return None
+
+    def process_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._proceed = True
+
+    def _legal_moves(self, board: Block) \
+            -> List[Tuple[str, Optional[int], Block]]:
+        """Return the legal moves on <board> that this player searches, in a
+        random order.
+        """
+        moves = [move for move in move_index(board).legal_moves(
+            self.goal.colour) if move[0] != SMASH[0]]
+        random.shuffle(moves)
+        return moves
+
+    def _select(self, node: _SearchNode, spread: float) -> _SearchNode:
+        """Return the child of <node> with the highest UCT value. <spread> is
+        the difference between the best and worst values seen so far, which
+        puts the exploration term on the same scale as the scores.
+        """
+        log_visits = math.log(node.visits)
+        return max(node.children, key=lambda child: (
+            child.total / child.visits + self._exploration * spread *
+            math.sqrt(log_visits / child.visits)))
+
+    def generate_move(self, board: Block) ->\
+            Optional[Tuple[str, Optional[int], Block]]:
+        """Return the move that did best in the simulations run within this
+        player's time budget, or PASS if no move did better than doing
+        nothing.
+
+        This function does not mutate <board>.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+
+        deadline = time.perf_counter() + self._budget
+        colour = self.goal.colour
+        moves = move_index(board)
+        start = self.goal.score(board)
+        root = _SearchNode(None, None)
+        low = high = 0.0
+        while root.visits == 0 or time.perf_counter() < deadline:
+            journal = MoveJournal()
+            node = root
+            penalty = 0
+            # Go down the tree while every move from the node has a child
+            while node.untried == [] and node.children and \
+                    len(journal) < self._depth:
+                node = self._select(node, high - low)
+                if journal.apply(node.move[2], node.move[:2], colour):
+                    penalty += ACTION_PENALTY[node.move[:2]]
+            # Add a child for one move not tried yet
+            if len(journal) < self._depth:
+                if node.untried is None:
+                    node.untried = self._legal_moves(board)
+                if node.untried:
+                    child = _SearchNode(node.untried.pop(), node)
+                    node.children.append(child)
+                    node = child
+                    if journal.apply(node.move[2], node.move[:2], colour):
+                        penalty += ACTION_PENALTY[node.move[:2]]
+            # Finish the simulation with random moves
+            for _ in range(self._depth - len(journal)):
+                move = moves.random_move(colour)
+                if move is not None and move[0] != SMASH[0] and \
+                        journal.apply(move[2], move[:2], colour):
+                    penalty += ACTION_PENALTY[move[:2]]
+            value = self.goal.score(board) - start - penalty
+            while journal.undo():
+                pass
+            low, high = min(low, value), max(high, value)
+            while node is not None:
+                node.visits += 1
+                node.total += value
+                node = node.parent
+
+        self._proceed = False  # Must set to False before returning!
+        if not root.children:
+            return PASS[0], PASS[1], board
+        best = max(root.children, key=lambda child: child.visits)
+        if best.total <= 0:
+            # on average, the best move did no better than passing
+            return PASS[0], PASS[1], board
+        return best.move
+
+
+# The kinds of value stored in a LookaheadPlayer's transposition table: the
+# exact value of the position, or a bound on it found when the search was cut
+# off by alpha-beta pruning.
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+def _move_key(move: Tuple[str, Optional[int], Block]) \
+        -> Tuple[str, Optional[int], int, Tuple[int, int]]:
+    """Return a key for <move> that names its block by level and position, so
+    that it can be matched against the moves of a board reached in another
+    way.
+    """
+    return move[0], move[1], move[2].level, move[2].position
+
+
+class LookaheadPlayer(Player):
+    """A player which searches a number of plies ahead, taking turns with the
+    other players in the order they play in.
+
+    The search is a paranoid minimax with alpha-beta pruning: this player
+    makes the move that is best for it, and every other player is assumed to
+    reply with the move that is worst for it. A position is worth this
+    player's score, less the best score of any other player, less the
+    ACTION_PENALTY of this player's moves along the way.
+
+    The search is deepened one ply at a time until it reaches the number of
+    plies asked for or the time budget runs out, and the moves at the root
+    are tried best first in the next iteration. Positions already searched
+    are kept in a transposition table keyed by the board's fingerprint, along
+    with the best move found there, which is tried first when the position
+    is reached again. The table keeps the most recently used positions and
+    is kept between turns.
+
+    Only <width> moves, drawn at random from the board's MoveIndex, and
+    passing are tried by each player at each position. Smash is never tried,
+    since the blocks it makes are random and differ every time it is made.
+    """
+    # === Private Attributes ===
+    # _proceed:
+    #   True when the player should make a move, False when the player should
+    #   wait.
+    # _goals:
+    #   The goal of every player, in the order they play in. _goals[i] is
+    #   the goal of the player whose id is i.
+    # _plies:
+    #   The number of moves searched ahead, counting this player's move.
+    # _width:
+    #   The number of moves tried by each player at each position.
+    # _budget:
+    #   The number of seconds that generate_move searches for.
+    # _table:
+    #   The transposition table. _table[(fingerprint, player)] is (plies,
+    #   value, kind, best move) for the position with that fingerprint when
+    #   the player at index <player> in _goals is to move: the value found by
+    #   searching <plies> plies, whether it is _EXACT, a _LOWER bound or an
+    #   _UPPER bound, and the _move_key of the best move found, if any. The
+    #   most recently used entry is last.
+    # _table_size:
+    #   The largest number of entries kept in _table.
+    # _deadline:
+    #   The time, as given by time.perf_counter, at which the current search
+    #   stops.
+    _proceed: bool
+    _goals: List[Goal]
+    _plies: int
+    _width: int
+    _budget: float
+    _table: OrderedDict
+    _table_size: int
+    _deadline: float
+
+    def __init__(self, player_id: int, goals: List[Goal], plies: int = 2,
+                 width: int = 8, budget: float = 1.0,
+                 table_size: int = 10000) -> None:
+        """Initialize this player with the goal at index <player_id> of
+        <goals>, which holds the goal of every player in the order they play
+        in.
+
+        Precondition: 0 <= player_id < len(goals)
+        """
+        Player.__init__(self, player_id, goals[player_id])
+        self._proceed = False
+        self._goals = goals
+        self._plies = plies
+        self._width = width
+        self._budget = budget
+        self._table = OrderedDict()
+        self._table_size = table_size
+        self._deadline = 0.0
+
+    def get_selected_block(self, board: Block) -> Optional[Block]:
+        return None
+
+    def process_event(self, event: pygame.event.Event) -> None:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self._proceed = True
+
+    def _candidates(self, board: Block, mover: int) \
+            -> List[Tuple[str, Optional[int], Block]]:
+        """Return the moves tried by the player at index <mover> in _goals:
+        passing, then up to _width different legal moves drawn at random.
+        """
+        colour = self._goals[mover].colour
+        moves = move_index(board)
+        candidates = [(PASS[0], PASS[1], board)]
+        seen = set()
+        for _ in range(2 * self._width):
+            move = moves.random_move(colour)
+            if move is not None and move[0] != SMASH[0]:
+                key = _move_key(move)
+                if key not in seen:
+                    seen.add(key)
+                    candidates.append(move)
+                    if len(seen) == self._width:
+                        break
+        return candidates
+
+    def _evaluate(self, board: Block) -> int:
+        """Return this player's score on <board>, less the best score of any
+        other player.
+        """
+        others = [fused_score(board, goal) for i, goal in
+                  enumerate(self._goals) if i != self.id]
+        return fused_score(board, self.goal) - max(others, default=0)
+
+    def _store(self, key: Tuple[int, int],
+               entry: Tuple[int, float, int, Optional[tuple]]) -> None:
+        """Put <entry> in the transposition table at <key>, evicting the least
+        recently used entry if the table is full.
+        """
+        self._table[key] = entry
+        self._table.move_to_end(key)
+        if len(self._table) > self._table_size:
+            self._table.popitem(last=False)
+
+    def _try(self, board: Block, move: Tuple[str, Optional[int], Block],
+             mover: int, plies: int, alpha: float, beta: float) \
+            -> Optional[float]:
+        """Return the value of making <move> on <board> as the player at index
+        <mover> in _goals and searching <plies> - 1 more plies, or None if the
+        move is not legal.
+
+        <board> is left as it was.
+        """
+        penalty = ACTION_PENALTY[move[:2]] if mover == self.id else 0
+        journal = MoveJournal()
+        if move[0] != PASS[0] and \
+                not journal.apply(move[2], move[:2], self._goals[mover].colour):
+            return None
+        value = self._search(board, (mover + 1) % len(self._goals), plies - 1,
+                             alpha + penalty, beta + penalty) - penalty
+        journal.undo()
+        return value
+
+    def _search(self, board: Block, mover: int, plies: int, alpha: float,
+                beta: float) -> float:
+        """Return the value of <board> with the player at index <mover> in
+        _goals to move, searched <plies> plies ahead.
+
+        The value is exact if it is strictly between <alpha> and <beta>.
+        Otherwise it is only a bound: at most <alpha>, or at least <beta>.
+        """
+        if plies == 0:
+            return self._evaluate(board)
+        if time.perf_counter() >= self._deadline:
+            return self._evaluate(board)  # this iteration will be thrown away
+
+        key = (board.fingerprint(), mover)
+        entry = self._table.get(key)
+        best_key = None
+        if entry is not None:
+            self._table.move_to_end(key)
+            entry_plies, value, kind, best_key = entry
+            if entry_plies >= plies:
+                if kind == _EXACT or \
+                        (kind == _LOWER and value >= beta) or \
+                        (kind == _UPPER and value <= alpha):
+                    return value
+
+        candidates = self._candidates(board, mover)
+        if best_key is not None:
+            # Try the best move found here before first, even if it was not
+            # drawn this time
+            name, direction, level, position = best_key
+            block = _get_block(board, position, level)
+            if block is not None and block.level == level:
+                candidates = [(name, direction, block)] + \
+                    [move for move in candidates if _move_key(move) != best_key]
+
+        maximizing = mover == self.id
+        start_alpha, start_beta = alpha, beta
+        best = -math.inf if maximizing else math.inf
+        for move in candidates:
+            value = self._try(board, move, mover, plies, alpha, beta)
+            if value is None:
+                continue
+            if (maximizing and value > best) or \
+                    (not maximizing and value < best):
+                best = value
+                best_key = _move_key(move)
+            if maximizing:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        if best <= start_alpha:
+            kind = _UPPER
+        elif best >= start_beta:
+            kind = _LOWER
+        else:
+            kind = _EXACT
+        if time.perf_counter() < self._deadline:
+            # A search cut short by the deadline is not stored
+            self._store(key, (plies, best, kind, best_key))
+        return best
+
+    def generate_move(self, board: Block) ->\
+            Optional[Tuple[str, Optional[int], Block]]:
+        """Return the best move found by searching up to _plies plies ahead
+        within this player's time budget, or PASS if no move does better
+        than doing nothing.
+
+        This function does not mutate <board>.
+        """
+        if not self._proceed:
+            return None  # Do not remove
+
+        self._deadline = time.perf_counter() + self._budget
+        moves = self._candidates(board, self.id)
+        best = moves[0]  # pass
+        for plies in range(1, self._plies + 1):
+            values = {}
+            alpha = -math.inf
+            best_in_iteration = moves[0]
+            for move in moves:
+                value = self._try(board, move, self.id, plies, alpha,
+                                  math.inf)
+                if time.perf_counter() >= self._deadline:
+                    break
+                if value is not None:
+                    values[id(move)] = value
+                    # A tie goes to the move tried first, so passing wins
+                    # ties in the first iteration
+                    if value > alpha:
+                        alpha = value
+                        best_in_iteration = move
+            else:
+                best = best_in_iteration
+                # Try the best moves first in the next iteration
+                moves.sort(key=lambda m: -values.get(id(m), -math.inf))
+                continue
+            if plies == 1:
+                best = best_in_iteration
+            break
+
+        self._proceed = False  # Must set to False before returning!
+        return best
 
 
 if __name__ == '__main__':
@@ -456,7 +822,8 @@ if __name__ == '__main__':
         'allowed-io': ['process_event'],
         'allowed-import-modules': [
             'doctest', 'python_ta', 'random', 'typing', 'actions', 'block',
-            'goal', 'pygame', '__future__'
+            'goal', 'moves', 'pygame', '__future__', 'math', 'time',
+            'collections'
         ],
         'max-attributes': 10,
         'generated-members': 'pygame.*'
@@ -21,7 +21,7 @@ Misha Schwartz, and Jaisie Sin.
 
 This file contains the global settings for the blocky game.
 """
-from typing import Tuple
+from typing import Dict, List, Tuple, Union
 
 # Colours that we could use in the game
 WHITE = (255, 255, 255)
@@ -36,6 +36,14 @@ TEMPTING_TURQUOISE = (75, 196, 213)
 # A pallette of the colours we use in the game
 COLOUR_LIST = [PACIFIC_POINT, REAL_RED, OLD_OLIVE, DAFFODIL_DELIGHT]
 
+# Blocks and goals store a colour as its index in PALETTE. The first colours
+# in PALETTE are the ones in COLOUR_LIST, in the same order, and any other
+# colour is added to the end the first time colour_index sees it.
+PALETTE: List[Tuple[int, int, int]] = COLOUR_LIST[:]
+_PALETTE_INDEX: Dict[Tuple[int, int, int], int] = {
+    colour: i for i, colour in enumerate(PALETTE)
+}
+
 # The game board will be a square with this size.
 BOARD_SIZE = 750
 
@@ -56,15 +64,36 @@ HIGHLIGHT_THICKNESS = 5
 ANIMATION_DURATION = 1
 
 
-def colour_name(colour: Tuple[int, int, int]) -> str:
+def colour_index(colour: Tuple[int, int, int]) -> int:
+    """Return the index of <colour> in PALETTE, adding it to PALETTE if it is
+    not there yet.
+
+    >>> colour_index(REAL_RED)
+    1
+    >>> PALETTE[colour_index(WHITE)] == WHITE
+    True
+    """
+    if colour not in _PALETTE_INDEX:
+        _PALETTE_INDEX[colour] = len(PALETTE)
+        PALETTE.append(colour)
+    return _PALETTE_INDEX[colour]
+
+
+def colour_name(colour: Union[int, Tuple[int, int, int]]) -> str:
     """Return the colour name associated with this colour value, or the empty
     string if this colour value isn't in our colour list.
 
+    <colour> is either a colour value or its index in PALETTE.
+
     >>> colour_name((1, 128, 181))
     'Pacific Point'
     >>> colour_name(PACIFIC_POINT)
     'Pacific Point'
+    >>> colour_name(1)
+    'Real Red'
     """
+    if isinstance(colour, int):
+        colour = PALETTE[colour]
     colour_names = {
         PACIFIC_POINT: 'Pacific Point',
         REAL_RED: 'Real Red',
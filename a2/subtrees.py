@@ -0,0 +1,207 @@
+"""CSC148 Assignment 2
+
+=== CSC148 Winter 2020 ===
+Department of Computer Science,
+University of Toronto
+
+This code is provided solely for the personal and private use of
+students taking the CSC148 course at the University of Toronto.
+Copying for purposes other than this use is expressly prohibited.
+All forms of distribution of this code, whether as given or with
+any changes, are expressly prohibited.
+
+Authors: Diane Horton, David Liu, Mario Badr, Sophia Huynh, Misha Schwartz,
+and Jaisie Sin
+
+All of the files in this directory and all subdirectories are:
+Copyright (c) Diane Horton, David Liu, Mario Badr, Sophia Huynh,
+Misha Schwartz, and Jaisie Sin
+
+=== Module Description ===
+
+This file contains the SubtreeStore class, which stores Blocky boards as a
+directed acyclic graph in which each distinct subtree is kept only once.
+
+Random boards repeat the same small subtrees over and over, especially
+undivided blocks near max_depth. A SubtreeStore gives each distinct subtree
+an int id, so two subtrees are equal iff they have the same id, no matter
+where they are on the board or on which board they are. Anything worked out
+for a subtree, such as its flattened unit cells or a goal's score, is
+remembered by id and reused by every board that contains that subtree.
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+from block import Block
+from goal import Goal
+from settings import PALETTE
+
+
+class SubtreeStore:
+    """A store of the distinct subtrees of boards with the same max_depth.
+
+    An id is only meaningful to the store that handed it out.
+
+    === Public Attributes ===
+    max_depth:
+        The deepest level allowed in the boards in this store.
+
+    === Representation Invariants ===
+    - _ids[key] == i iff _keys[i] == key
+    - every id in a key is smaller than the id of that key
+    """
+    # === Private Attributes ===
+    # _keys:
+    #   _keys[i] describes the subtree with id i. An undivided block is
+    #   described by (level, colour) where colour is an index into PALETTE,
+    #   and a subdivided block by (level, id0, id1, id2, id3), the ids of its
+    #   children in the same order as Block.children.
+    # _ids:
+    #   The id of each key in _keys.
+    # _flat:
+    #   The subtrees already flattened by flatten, keyed by id.
+    # _scores:
+    #   The scores already worked out by score, keyed by (id, goal type,
+    #   goal colour index).
+    max_depth: int
+    _keys: List[Tuple[int, ...]]
+    _ids: Dict[Tuple[int, ...], int]
+    _flat: Dict[int, List[List[int]]]
+    _scores: Dict[Tuple[int, type, int], int]
+
+    def __init__(self, max_depth: int) -> None:
+        """Initialize an empty store for boards with a depth of <max_depth>.
+        """
+        self.max_depth = max_depth
+        self._keys = []
+        self._ids = {}
+        self._flat = {}
+        self._scores = {}
+
+    def __len__(self) -> int:
+        """Return the number of distinct subtrees in this store.
+        """
+        return len(self._keys)
+
+    def _id(self, key: Tuple[int, ...]) -> int:
+        """Return the id of the subtree described by <key>, adding it to this
+        store if it is new.
+        """
+        subtree = self._ids.get(key)
+        if subtree is None:
+            subtree = len(self._keys)
+            self._keys.append(key)
+            self._ids[key] = subtree
+        return subtree
+
+    def leaf(self, level: int, colour: int) -> int:
+        """Return the id of an undivided block at <level> whose colour is the
+        one at index <colour> in PALETTE.
+        """
+        return self._id((level, colour))
+
+    def parent(self, level: int, children: Tuple[int, int, int, int]) -> int:
+        """Return the id of a block at <level> that is subdivided into the
+        subtrees with the ids in <children>.
+        """
+        return self._id((level,) + tuple(children))
+
+    def intern(self, block: Block) -> int:
+        """Return the id of the subtree rooted at <block>, adding it and any of
+        its descendants that are new to this store.
+
+        Precondition: block.max_depth == self.max_depth
+        """
+        children = block.children
+        if len(children) == 4:
+            return self._id((block.level, self.intern(children[0]),
+                             self.intern(children[1]),
+                             self.intern(children[2]),
+                             self.intern(children[3])))
+        return self._id((block.level, block.colour_index))
+
+    def level(self, subtree: int) -> int:
+        """Return the level of the root of <subtree>.
+        """
+        return self._keys[subtree][0]
+
+    def children(self, subtree: int) -> List[int]:
+        """Return the ids of the children of <subtree>, or an empty list if it
+        is undivided.
+        """
+        return list(self._keys[subtree][1:]) \
+            if len(self._keys[subtree]) == 5 else []
+
+    def colour(self, subtree: int) -> int:
+        """Return the index in PALETTE of the colour of <subtree>, or -1 if it
+        is subdivided.
+        """
+        key = self._keys[subtree]
+        return key[1] if len(key) == 2 else -1
+
+    def to_block(self, subtree: int, size: int,
+                 position: Tuple[int, int] = (0, 0)) -> Block:
+        """Return a new Block tree holding <subtree>, with dimensions of <size>
+        by <size> and its upper left corner at <position>.
+        """
+        key = self._keys[subtree]
+        if len(key) == 2:
+            return Block(position, size, PALETTE[key[1]], key[0],
+                         self.max_depth)
+        block = Block(position, size, None, key[0], self.max_depth)
+        positions = block._children_positions()
+        child_size = block._child_size()
+        block.children = [self.to_block(key[i + 1], child_size, positions[i])
+                          for i in range(4)]
+        return block
+
+    def flatten(self, subtree: int) -> List[List[int]]:
+        """Return <subtree> as a two-dimensional list of unit cells, in the
+        same form as goal._flatten_indices.
+
+        The result is remembered and shared with later calls and with the
+        results for larger subtrees, so it must not be changed.
+        """
+        flat = self._flat.get(subtree)
+        if flat is None:
+            key = self._keys[subtree]
+            if len(key) == 2:
+                # Every column of an undivided block is the same
+                column = [key[1]] * 2 ** (self.max_depth - key[0])
+                flat = [column] * len(column)
+            else:
+                child0, child1, child2, child3 = \
+                    [self.flatten(child) for child in key[1:]]
+                flat = [child1[i] + child2[i] for i in range(len(child0))] + \
+                    [child0[i] + child3[i] for i in range(len(child0))]
+            self._flat[subtree] = flat
+        return flat
+
+    def score(self, subtree: int, goal: Goal) -> int:
+        """Return the score for <goal> on the board <subtree>.
+
+        Scores are remembered, so scoring a board that is already in this
+        store again is a dict lookup.
+        """
+        key = (subtree, type(goal), goal.colour_index)
+        if key not in self._scores:
+            self._scores[key] = goal._score_indices(self.flatten(subtree))
+        return self._scores[key]
+
+    def clear_cache(self) -> None:
+        """Forget the flattened subtrees and scores remembered so far, but
+        keep the subtrees themselves and their ids.
+        """
+        self._flat = {}
+        self._scores = {}
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-import-modules': [
+            'doctest', 'python_ta', 'typing', '__future__', 'block', 'goal',
+            'settings'
+        ],
+        'max-attributes': 15
+    })